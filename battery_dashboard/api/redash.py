@@ -0,0 +1,210 @@
+# battery_dashboard/api/redash.py
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from ..config import (REDASH_URL, REDASH_API_KEY, REDASH_TIMEOUT, REDASH_POOL_SIZE,
+                      REDASH_MAX_RETRIES, REDASH_BACKOFF_BASE, REDASH_BACKOFF_MAX,
+                      REDASH_CIRCUIT_THRESHOLD, REDASH_CIRCUIT_COOLDOWN,
+                      REDASH_JOB_TIMEOUT, REDASH_JOB_POLL_INTERVAL, REDASH_JOB_POLL_MAX_INTERVAL)
+
+# HTTP statuses worth retrying: rate limiting and transient server/gateway errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Redash job statuses
+JOB_PENDING, JOB_STARTED, JOB_SUCCESS, JOB_FAILURE, JOB_CANCELLED = 1, 2, 3, 4, 5
+
+
+class RedashError(Exception):
+    """Raised when Redash cannot return a result for a query."""
+
+
+class CircuitOpenError(RedashError):
+    """Raised without contacting Redash while the circuit breaker is open."""
+
+
+def response_json(response):
+    """Decode a Redash JSON response, raising ``RedashError`` if the body is not JSON.
+
+    Proxies and login redirects answer with HTML pages, on which ``response.json()`` would
+    raise a bare ``ValueError``.
+    """
+    try:
+        return response.json()
+    except ValueError as e:
+        raise RedashError(f"Redash returned a non-JSON response from {response.url}: {e}") from e
+
+
+class RedashClient:
+    """Thread-safe Redash API client shared by all dashboard sessions.
+
+    Requests go through one pooled keep-alive ``requests.Session``. Connection errors,
+    timeouts and retryable statuses are retried with exponential backoff and full jitter.
+    After ``circuit_threshold`` consecutive failed requests the circuit opens and calls fail
+    fast with ``CircuitOpenError`` for ``circuit_cooldown`` seconds, after which a single
+    trial request is let through.
+    """
+
+    def __init__(self, base_url=REDASH_URL, api_key=REDASH_API_KEY, timeout=REDASH_TIMEOUT,
+                 pool_size=REDASH_POOL_SIZE, max_retries=REDASH_MAX_RETRIES,
+                 backoff_base=REDASH_BACKOFF_BASE, backoff_max=REDASH_BACKOFF_MAX,
+                 circuit_threshold=REDASH_CIRCUIT_THRESHOLD, circuit_cooldown=REDASH_CIRCUIT_COOLDOWN):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.circuit_threshold = circuit_threshold
+        self.circuit_cooldown = circuit_cooldown
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Key {api_key}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def circuit_open(self):
+        """True while requests are being short-circuited."""
+        with self._lock:
+            return self._opened_at is not None
+
+    def execute_query(self, query_id, params=None, max_age=None, stream=False):
+        """POST to a saved query's results endpoint and return the response.
+
+        Redash answers with a ``query_result`` if it holds one younger than ``max_age``
+        seconds, otherwise with a ``job`` to poll. Without ``max_age`` Redash always
+        re-executes the query.
+        """
+        body = {"parameters": params or {}}
+        if max_age is not None:
+            body["max_age"] = max_age
+        return self.request("POST", f"/api/queries/{query_id}/results", json=body, stream=stream)
+
+    def post_query_results(self, query_id, params=None, max_age=None):
+        """Execute (or fetch the cached result of) a saved query and return the JSON payload."""
+        return response_json(self.execute_query(query_id, params, max_age))
+
+    def get_query_result(self, query_result_id, filetype="json", stream=False):
+        """Download a stored query result as ``json`` or ``csv``."""
+        return self.request("GET", f"/api/query_results/{query_result_id}.{filetype}", stream=stream)
+
+    def wait_for_job(self, job, timeout=REDASH_JOB_TIMEOUT):
+        """Poll a query execution job until it finishes and return its query_result_id.
+
+        The poll interval starts at ``REDASH_JOB_POLL_INTERVAL`` and grows by half each poll
+        up to ``REDASH_JOB_POLL_MAX_INTERVAL``. Raises ``RedashError`` if the job fails, is
+        cancelled or does not finish within ``timeout`` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        interval = REDASH_JOB_POLL_INTERVAL
+        while True:
+            status = job.get("status")
+            if status == JOB_SUCCESS:
+                return job["query_result_id"]
+            if status in (JOB_FAILURE, JOB_CANCELLED):
+                raise RedashError(f"Redash job {job.get('id')} failed: {job.get('error') or 'cancelled'}")
+            if time.monotonic() + interval > deadline:
+                raise RedashError(f"Redash job {job.get('id')} did not finish within {timeout}s")
+
+            time.sleep(interval)
+            interval = min(interval * 1.5, REDASH_JOB_POLL_MAX_INTERVAL)
+            payload = response_json(self.request("GET", f"/api/jobs/{job['id']}"))
+            if "job" not in payload:
+                raise RedashError(f"Redash job {job.get('id')} poll returned no job")
+            job = payload["job"]
+
+    def request(self, method, path, **kwargs):
+        """Send a request with retries, raising ``RedashError`` once they are exhausted."""
+        self._before_request()
+        url = f"{self.base_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self._backoff_delay(attempt - 1))
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                last_error = e
+                continue
+            except requests.exceptions.RequestException as e:
+                self._record_failure()
+                raise RedashError(f"{method} {path} failed: {e}") from e
+
+            if response.status_code in RETRY_STATUSES:
+                last_error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Server Error for url: {url}", response=response)
+                continue
+
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                # Client errors are not Redash being unavailable, so they don't count
+                # towards opening the circuit
+                self._record_success()
+                raise RedashError(f"{method} {path} failed: {e}") from e
+
+            self._record_success()
+            return response
+
+        self._record_failure()
+        raise RedashError(f"{method} {path} failed after {self.max_retries + 1} attempts: {last_error}") \
+            from last_error
+
+    def _backoff_delay(self, attempt):
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _before_request(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.circuit_cooldown or self._trial_in_flight:
+                raise CircuitOpenError("Redash circuit breaker is open, skipping request")
+            # Cooldown elapsed: let one trial request through
+            self._trial_in_flight = True
+
+    def _record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                print("Redash is reachable again, closing circuit breaker")
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def _record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._consecutive_failures >= self.circuit_threshold:
+                if self._opened_at is None:
+                    print(f"Redash failed {self._consecutive_failures} times in a row, "
+                          f"opening circuit breaker for {self.circuit_cooldown}s")
+                self._opened_at = time.monotonic()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_redash_client():
+    """Return the process-wide Redash client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RedashClient()
+    return _client
@@ -1,31 +1,44 @@
 # battery_dashboard/components/cell_selector.py
 # Modular class for Cell Selector Tab
+import numpy as np
 import panel as pn
 import polars as pl
 import param
-import re
 from ..data.loaders import get_redash_query_results
+from ..data.catalog import CatalogSnapshot
+from ..data.indexes import FILTER_COLUMNS
+from ..data.search import compile_search, narrows, SearchSyntaxError
+from ..data.paging import PagedTableSource
+from ..data.prefetch import CyclePrefetcher
+from ..config import CYCLE_PREFETCH, SEARCH_AS_YOU_TYPE, SEARCH_DEBOUNCE_MS
 
 
-def create_filter_widgets(df):
-    """Dynamically generate filter widgets based on available columns, handling NaN values."""
+def create_filter_widgets(snapshot):
+    """Generate a multi-value filter widget for each filter column in the catalog.
+
+    The options come from the snapshot's filter index, so they are computed once per
+    catalog version rather than per session. An empty selection means 'no filter'.
+    """
+    index = snapshot.filter_index()
     filter_widgets = {}
-    for column in ["design_name", "experiment_group", "layer_types", "test_status", "test_year"]:
-        if column in df.columns:
-            options = df[column].drop_nulls().unique().to_list()
-            options = sorted([str(opt) for opt in options])  # Ensure all values are strings
-            options = [""] + options  # Add empty option for 'no filter'
-            filter_widgets[column] = pn.widgets.Select(name=column.replace("_", " ").title(), options=options)
+    for column in FILTER_COLUMNS:
+        if column in index.options:
+            filter_widgets[column] = pn.widgets.MultiChoice(name=column.replace("_", " ").title(),
+                                                            options=index.options[column],
+                                                            placeholder="All")
     return filter_widgets
 
 
-def apply_filters(data, filters):
-    """Apply filter widget selections to the Polars dataframe."""
-    filtered_data = data.clone()
-    for key, widget in filters.items():
-        if widget.value:
-            filtered_data = filtered_data.filter(pl.col(key) == widget.value)
-    return filtered_data
+def apply_filters(view, filters):
+    """Apply filter widget selections to a catalog view, returning the view of matching rows.
+
+    Rows must match one of the selected values of every filter; the rows are looked up in
+    the snapshot's filter index.
+    """
+    selections = {key: widget.value for key, widget in filters.items() if widget.value}
+    if not selections:
+        return view
+    return view.filter_mask(view.snapshot.filter_index().mask(selections))
 
 class CellSelectorTab(param.Parameterized):
     selected_cell_ids = param.List(default=[], doc="Selected cell IDs")
@@ -33,22 +46,39 @@ class CellSelectorTab(param.Parameterized):
     search_query = param.String(default="", doc="Search query")
 
 
-    def __init__(self, cell_data, **params):
+    def __init__(self, cell_data, catalog=None, **params):
         super().__init__(**params)
-        self.cell_data = cell_data  # Store the original full dataset
-
-        # Filtered and displayed data
-        self.filtered_cell_data = cell_data
+        # The full dataset is shared with other sessions through the catalog snapshot, never copied
+        self.catalog = catalog
+        self.snapshot = catalog.snapshot if catalog is not None else CatalogSnapshot(0, cell_data)
+        self.cell_data = self.snapshot.data
+        self._catalog_updating = False
+        # Warms the cycle cache while cells are being checked
+        self.prefetcher = CyclePrefetcher() if CYCLE_PREFETCH else None
+
+        # Filtered and displayed rows, as row indices into the snapshot. base_view holds the
+        # rows matching the filter widgets, before the search query is applied.
+        self.base_view = self.snapshot.view()
+        self.filtered_view = self.base_view
+        # Search text whose result filtered_view holds, and the live search state
+        self._applied_query = ""
+        self._search_generation = 0
+        self._search_timeout = None
+        # The table only holds the current page; the selection is kept as snapshot row
+        # positions so it survives paging and sorting
+        self.table_source = PagedTableSource(self.base_view)
+        self.selected_rows = np.empty(0, dtype=np.int64)
+        self._syncing_selection = False
 
         self.required_columns = ["cell_id"]
-        self.optional_columns = [col for col in cell_data.columns if col not in self.required_columns]
+        self.optional_columns = [col for col in self.cell_data.columns if col not in self.required_columns]
         self.default_columns = ["cell_id", "cell_name", "actual_nominal_capacity_ah", "regular_cycles",
                                 "last_discharge_capacity", "discharge_capacity_retention"]
 
         # Create search bar
         self.search_input = pn.widgets.TextInput(
             name="Search",
-            placeholder="Enter search terms (column:value or free text)",
+            placeholder="Search: free text, column:value, cycles:100..500, status:a,b, AND/OR/NOT",
             width=400
         )
         self.search_button = pn.widgets.Button(
@@ -63,7 +93,7 @@ class CellSelectorTab(param.Parameterized):
         )
         self.search_info = pn.pane.Markdown("", styles={"color": "blue", "font-style": "italic"})
 
-        self.filter_widgets = create_filter_widgets(self.cell_data)
+        self.filter_widgets = create_filter_widgets(self.snapshot)
         self.selection_indicator = pn.pane.Markdown("**0** cells selected")
         self.column_selector = pn.widgets.MultiSelect(
             name="Select Columns to Display",
@@ -89,10 +119,10 @@ class CellSelectorTab(param.Parameterized):
         #     height=600,
         #     theme_classes=["table-bordered", "thead-dark"],
         # )
+        # Paging, sorting and header filters are served by self.table_source
         self.data_table = pn.widgets.Tabulator(
-            pagination="remote",
-            page_size=50,
             selectable="checkbox",
+            header_filters=True,
             header_align="left",
             layout="fit_data_table",
             show_index=False,
@@ -113,6 +143,12 @@ class CellSelectorTab(param.Parameterized):
             }
         )
 
+        self.prev_page_button = pn.widgets.Button(name="‹ Previous", width=100)
+        self.next_page_button = pn.widgets.Button(name="Next ›", width=100)
+        self.page_info = pn.pane.Markdown("", margin=(0, 10))
+        # Built once; every layout shows this row instead of creating its own
+        self.pager = self.create_pager()
+
         # Add a load button
         self.load_button = pn.widgets.Button(
             name="Load Cycle Data",
@@ -126,10 +162,21 @@ class CellSelectorTab(param.Parameterized):
         # Add to the end of your __init__ method:
         self.update_load_button_state()  # Initialize button state
 
+        # Follow catalog refreshes made by the shared catalog
+        if catalog is not None:
+            self._doc = pn.state.curdoc
+            watcher = catalog.param.watch(self.on_catalog_version, "version")
+            if self._doc is not None and self._doc.session_context is not None:
+                pn.state.on_session_destroyed(lambda session_context: catalog.param.unwatch(watcher))
+
     def setup_event_handlers(self):
         for widget in self.filter_widgets.values():
             widget.param.watch(self.update_table_data, "value")
         self.data_table.param.watch(self.on_cell_selection, "selection")
+        self.data_table.param.watch(self.on_table_sort, "sorters")
+        self.data_table.param.watch(self.on_table_filter, "filters")
+        self.prev_page_button.on_click(lambda event: self.show_page(self.table_source.page - 1))
+        self.next_page_button.on_click(lambda event: self.show_page(self.table_source.page + 1))
         self.column_selector.param.watch(self.update_table_data, "value")
 
         # Add button click handler
@@ -138,14 +185,95 @@ class CellSelectorTab(param.Parameterized):
         # Add search event handlers
         self.search_button.on_click(self.on_search)
         self.clear_search_button.on_click(self.clear_search)
-        self.search_input.param.watch(self.on_search_enter, "value_input")
+        self.search_input.param.watch(self.on_search_input, "value_input")
+
+    def on_catalog_version(self, event):
+        """Schedule a catalog update on this session's document (refreshes run on another thread)."""
+        if self._doc is not None and self._doc.session_context is not None:
+            self._doc.add_next_tick_callback(self.on_catalog_update)
+        else:
+            self.on_catalog_update()
+
+    def on_catalog_update(self):
+        """Pick up the latest catalog, keeping the current filters, columns and selection."""
+        selected_cell_ids = list(self.selected_cell_ids)
+        self.snapshot = self.catalog.snapshot
+        self.cell_data = self.snapshot.data
+
+        self._catalog_updating = True
+        try:
+            index = self.snapshot.filter_index()
+            for column, widget in self.filter_widgets.items():
+                options = index.options.get(column, [])
+                widget.options = options
+                widget.value = [value for value in widget.value if value in set(options)]
+            self.optional_columns = [col for col in self.cell_data.columns if col not in self.required_columns]
+            self.column_selector.options = self.optional_columns
+        finally:
+            self._catalog_updating = False
+        self.update_table_data()
+
+        # Reselect the cells that are still in the table
+        if selected_cell_ids:
+            shown = self.table_source.ordered_view()
+            keep = shown.frame(["cell_id"])["cell_id"].is_in(selected_cell_ids).to_numpy()
+            self.set_selected_rows(shown.rows[keep])
+            self.show_page(self.table_source.page)
 
-    def on_search_enter(self, event):
-        """Handle pressing Enter in the search box"""
+    def on_search_input(self, event):
+        """Handle typing in the search box: Enter searches at once, other keystrokes are debounced"""
         if event.new and event.new.endswith('\n'):
             # Remove the newline character
             self.search_input.value = event.new.rstrip('\n')
             self.on_search(None)
+        elif SEARCH_AS_YOU_TYPE:
+            self.schedule_live_search(event.new or "")
+
+    def schedule_live_search(self, text):
+        """Run a live search once typing pauses; every keystroke supersedes the pending search."""
+        self._search_generation += 1
+        generation = self._search_generation
+        doc = pn.state.curdoc
+        if doc is None or doc.session_context is None:
+            self.run_live_search(generation, text)
+            return
+
+        if self._search_timeout is not None:
+            try:
+                doc.remove_timeout_callback(self._search_timeout)
+            except ValueError:
+                pass  # Already ran
+        self._search_timeout = doc.add_timeout_callback(
+            lambda: self.run_live_search(generation, text), SEARCH_DEBOUNCE_MS)
+
+    def run_live_search(self, generation, text):
+        """Search for ``text`` unless a newer keystroke has superseded it.
+
+        When the query only narrows the one already applied, the current results are
+        searched instead of every row matching the filters.
+        """
+        if generation != self._search_generation:
+            return
+        self._search_timeout = None
+        query = text.strip()
+        if query == self._applied_query:
+            return
+
+        if query:
+            try:
+                compile_search(query, self.snapshot.data.schema)
+            except SearchSyntaxError as e:
+                # Probably still being typed: keep the current results
+                self.search_info.object = f"⚠️ {e}"
+                return
+
+        view = self.base_view
+        if self._applied_query and narrows(self._applied_query, query):
+            view = self.filtered_view
+        self.search_query = query
+        if not query:
+            self.search_info.object = ""
+        self.show_view(self.apply_search_query(view, total=len(self.base_view)))
 
     def on_search(self, event):
         """Execute the search query"""
@@ -155,103 +283,30 @@ class CellSelectorTab(param.Parameterized):
 
     def clear_search(self, event):
         """Clear the search query and reset the table"""
+        self._search_generation += 1  # Drop any pending live search
         self.search_input.value = ""
         self.search_query = ""
         self.search_info.object = ""
         self.update_table_data()
 
-    def apply_search_query(self, df):
-        """Apply the search query to the dataframe"""
+    def apply_search_query(self, view, total=None):
+        """Apply the search query to a catalog view, returning the view of matching rows"""
         if not self.search_query:
-            return df
-
-        # Parse the search query
-        # Support both specific column searches (column:value) and free text search
-        query = self.search_query.lower()
-
-        # Check for column:value pattern
-        column_search_pattern = r'(\w+):\s*([\w.%<>=]+)'
-        column_searches = re.findall(column_search_pattern, query)
-
-        filtered_df = df
-        search_applied = False
-
-        # Handle column-specific searches
-        for col_name, search_value in column_searches:
-            # Remove these matches from the query for later free text search
-            query = query.replace(f"{col_name}:{search_value}", "").strip()
-
-            # Find the actual column name (case-insensitive match)
-            actual_col = next((c for c in df.columns if c.lower() == col_name.lower()), None)
-
-            if actual_col is None:
-                self.search_info.object = f"⚠️ Column '{col_name}' not found"
-                continue
-
-            # Check for comparison operators
-            if any(op in search_value for op in ['>', '<', '=']):
-                try:
-                    # Process numeric comparisons
-                    if '>=' in search_value:
-                        val = float(search_value.replace('>=', '').strip())
-                        filtered_df = filtered_df.filter(pl.col(actual_col) >= val)
-                    elif '<=' in search_value:
-                        val = float(search_value.replace('<=', '').strip())
-                        filtered_df = filtered_df.filter(pl.col(actual_col) <= val)
-                    elif '>' in search_value:
-                        val = float(search_value.replace('>', '').strip())
-                        filtered_df = filtered_df.filter(pl.col(actual_col) > val)
-                    elif '<' in search_value:
-                        val = float(search_value.replace('<', '').strip())
-                        filtered_df = filtered_df.filter(pl.col(actual_col) < val)
-                    elif '=' in search_value:
-                        val_str = search_value.replace('=', '').strip()
-                        # Try to convert to number if it looks numeric
-                        try:
-                            val = float(val_str)
-                            filtered_df = filtered_df.filter(pl.col(actual_col) == val)
-                        except ValueError:
-                            # It's a string
-                            filtered_df = filtered_df.filter(
-                                pl.col(actual_col).cast(pl.Utf8).str.contains(val_str, literal=True))
-                    search_applied = True
-                except ValueError:
-                    self.search_info.object = f"⚠️ Invalid numeric value in '{search_value}'"
-            else:
-                # Simple text match
-                filtered_df = filtered_df.filter(
-                    pl.col(actual_col).cast(pl.Utf8).str.contains(search_value, literal=True))
-                search_applied = True
-
-        # Apply free text search across all string columns if query still has content
-        query = query.strip()
-        if query:
-            # Build a combined filter for all string columns
-            string_filters = []
-            for col in df.columns:
-                # Only search string-compatible columns
-                try:
-                    # Create a filter for this column
-                    string_filters.append(pl.col(col).cast(pl.Utf8).str.contains(query))
-                except:
-                    # Skip columns that can't be converted to string for searching
-                    continue
-
-            if string_filters:
-                # Combine all column filters with OR
-                combined_filter = string_filters[0]
-                for filter_expr in string_filters[1:]:
-                    combined_filter = combined_filter | filter_expr
-
-                filtered_df = filtered_df.filter(combined_filter)
-                search_applied = True
-
-        if search_applied:
-            rows_found = len(filtered_df)
-            total_rows = len(df)
-            self.search_info.object = f"Found {rows_found} of {total_rows} cells matching search criteria"
-
-        return filtered_df
+            return view
+
+        # The whole query compiles to one predicate, evaluated in a single pass
+        try:
+            predicate = compile_search(self.search_query, view.snapshot.data.schema)
+        except SearchSyntaxError as e:
+            self.search_info.object = f"⚠️ {e}"
+            return view
+        if predicate is None:
+            return view
+
+        filtered_view = view.filter(predicate)
+        total = len(view) if total is None else total
+        self.search_info.object = f"Found {len(filtered_view)} of {total} cells matching search criteria"
+        return filtered_view
 
     def format_table_data(self, df):
         """Format table data with status indicators and better presentation"""
@@ -309,32 +364,83 @@ class CellSelectorTab(param.Parameterized):
         return column_config
 
     def update_table_data(self, *events):
-        # Apply row filters to get filtered rows (all columns)
-        self.filtered_cell_data = apply_filters(self.cell_data, self.filter_widgets)
+        if self._catalog_updating:
+            return
+
+        # Apply row filters to get the filtered rows as a view of the snapshot
+        self.base_view = apply_filters(self.snapshot.view(), self.filter_widgets)
 
         # Apply search query
-        self.filtered_cell_data = self.apply_search_query(self.filtered_cell_data)
+        self.show_view(self.apply_search_query(self.base_view))
+
+    def show_view(self, view):
+        """Display the rows of ``view`` in the table and clear the selection."""
+        self.filtered_view = view
+        self._applied_query = self.search_query
 
         # Get selected columns for display
         selected_columns = self.column_selector.value or []
         display_columns = self.required_columns + [col for col in selected_columns if col not in self.required_columns]
 
-        # Create display DataFrame with filtered rows and selected columns
-        display_df = self.filtered_cell_data.select(display_columns).to_pandas()
-
-        formatted_df = self.format_table_data(display_df)
-        self.data_table.value = formatted_df
-
-        # Update the table view with column-filtered data
-        self.data_table.value = display_df
+        # Header filters and sort stay in place; only the first page is gathered and sent
+        self.table_source.set_columns(display_columns)
+        self.table_source.set_view(view)
 
         # Clear selection when filters change
-        self.data_table.selection = []
+        if len(self.selected_rows):
+            self.set_selected_rows(self.selected_rows[:0])
         self.selected_cell_ids = []
         self.selected_data = None
         self.selection_indicator.object = "**0** cells selected"
+        self.show_page(0)
+
+        print(f"Table updated with {self.table_source.total} rows after filtering")
+
+    def show_page(self, page):
+        """Send one page of the table source to the table, with its selected rows checked."""
+        source = self.table_source
+        source.set_page(page)
+        page_rows = source.page_rows()
+
+        self._syncing_selection = True
+        try:
+            self.data_table.value = source.page_frame().to_pandas()
+            self.data_table.selection = np.flatnonzero(np.isin(page_rows, self.selected_rows)).tolist()
+        finally:
+            self._syncing_selection = False
+
+        first = source.page * source.page_size
+        self.page_info.object = (f"Page {source.page + 1} of {source.page_count} "
+                                 f"({first + 1 if len(page_rows) else 0}-{first + len(page_rows)} "
+                                 f"of {source.total} cells)")
+        self.prev_page_button.disabled = source.page == 0
+        self.next_page_button.disabled = source.page >= source.page_count - 1
+
+    def on_table_sort(self, event):
+        """Sort all rows of the table source, not just the page the browser holds."""
+        if self._syncing_selection:
+            return
+        self.table_source.set_sorters(event.new)
+        self.show_page(0)
 
-        print(f"Table updated with {len(display_df)} rows after filtering")
+    def on_table_filter(self, event):
+        """Apply header filters to all rows of the table source."""
+        if self._syncing_selection:
+            return
+        self.table_source.set_filters(event.new)
+        if len(self.selected_rows):
+            # Drop selected cells the header filters now hide
+            self.set_selected_rows(self.selected_rows)
+        self.show_page(0)
+
+    def create_pager(self):
+        """Create the previous/next page controls of the cell table"""
+        return pn.Row(
+            self.prev_page_button,
+            self.page_info,
+            self.next_page_button,
+            align="center"
+        )
 
     def create_selection_buttons(self):
         """Create the select all and clear selection buttons"""
@@ -366,17 +472,15 @@ class CellSelectorTab(param.Parameterized):
         )
 
     def select_all_cells(self, event):
-        """Select all cells in the current filtered dataset"""
-        if self.data_table.value is not None and not self.data_table.value.empty:
-            # Get all indices
-            all_indices = list(range(len(self.data_table.value)))
-            self.data_table.selection = all_indices
-            # The on_cell_selection handler will take care of updating selected_cell_ids
+        """Select all cells in the current filtered dataset, on every page"""
+        if self.table_source.total:
+            self.set_selected_rows(self.table_source.rows)
+            self.show_page(self.table_source.page)
 
     def clear_selection(self, event):
         """Clear the current selection"""
-        self.data_table.selection = []
-        # The on_cell_selection handler will take care of updating selected_cell_ids
+        self.set_selected_rows(self.selected_rows[:0])
+        self.show_page(self.table_source.page)
 
     def update_load_button_state(self):
         """Update the load button state based on selection"""
@@ -453,24 +557,37 @@ class CellSelectorTab(param.Parameterized):
         self.stats_content.append(pn.pane.Markdown(stats_md))
 
     def on_cell_selection(self, event):
+        """Merge the checked rows of the current page into the selection across all pages"""
+        if self._syncing_selection:
+            return
+        page_rows = self.table_source.page_rows()
         selected_indices = event.new if hasattr(event, "new") else []
-        if not selected_indices:
+        kept = self.selected_rows[~np.isin(self.selected_rows, page_rows)]
+        self.set_selected_rows(np.concatenate([kept, page_rows[selected_indices]]))
+
+    def set_selected_rows(self, rows):
+        """Select the snapshot rows ``rows`` and update the selected data, statistics and prefetch"""
+        # Kept in table order; only the selected rows are gathered from the shared snapshot
+        selected_view = self.table_source.ordered_view(rows)
+        self.selected_rows = selected_view.positions()
+        if not len(self.selected_rows):
             self.selected_cell_ids = []
             self.selected_data = None
             self.selection_indicator.object = "**0** cells selected"
+            if self.prefetcher is not None:
+                self.prefetcher.cancel()
+            self.update_selection_statistics()
+            self.update_load_button_state()
+            return
 
-        # Get the selected cell_ids from the displayed table
-        selected_rows = self.data_table.value.iloc[selected_indices]
-        selected_cell_ids = selected_rows['cell_id'].tolist()
-        self.selected_cell_ids = selected_cell_ids
-
-        # Then filter the full dataset based on these cell_ids
-        self.selected_data = self.filtered_cell_data.filter(
-            pl.col("cell_id").is_in(selected_cell_ids)
-        )
+        self.selected_data = selected_view.frame()
+        self.selected_cell_ids = self.selected_data["cell_id"].to_list()
 
         self.selection_indicator.object = f"**{len(self.selected_cell_ids)}** cells selected"
 
+        if self.prefetcher is not None:
+            self.prefetcher.update(self.selected_cell_ids, self.selected_data)
+
         # Update statistics and button state
         self.update_selection_statistics()
         self.update_load_button_state()
@@ -484,8 +601,8 @@ class CellSelectorTab(param.Parameterized):
             self.selection_indicator.object = f"**Fetching data for {len(self.selected_cell_ids)} cells...**"
 
             print(f"Loading data for {len(self.selected_cell_ids)} selected cells...")
-            self.param.trigger('selected_cell_ids')
-            self.param.trigger('selected_data')
+            # One event for both parameters, so the cycle tab loads once
+            self.param.trigger('selected_cell_ids', 'selected_data')
         else:
             print("No cells selected")
 
@@ -656,7 +773,7 @@ class CellSelectorTab(param.Parameterized):
         #         "selectableRangeMode": "click"
         #     }
         # )
-        return self.data_table
+        return pn.Column(self.data_table, self.pager)
 
     def create_modern_action_bar(self):
         """Create modern action bar with load button"""
@@ -810,6 +927,7 @@ class CellSelectorTab(param.Parameterized):
                 width_policy='max',
                 styles={'overflow-y': 'auto', 'overflow-x': 'auto'}
             ),
+            self.pager,
             action_row,
             sizing_mode="stretch_width"
         )
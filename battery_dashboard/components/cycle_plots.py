@@ -1,4 +1,8 @@
 # battery_dashboard/components/cycle_plots.py
+import sys
+import threading
+from functools import partial
+import numpy as np
 import panel as pn
 import polars as pl
 import param
@@ -6,11 +10,20 @@ import holoviews as hv
 import hvplot.polars
 from bokeh.palettes import Category10, Category20
 from bokeh.models import HoverTool, CrosshairTool, Span, Band
-from ..data.loaders import get_cycle_data
+from ..data.loaders import get_cycle_data, CycleLoadCancelled
+from ..data.transforms import normalize_cycle_data
+from ..config import CYCLE_OVERVIEW_MIN_CELLS
 import pandas as pd
 
-# Configure HoloViews to use Bokeh
-hv.extension('bokeh')
+_plotting_backend_loaded = False
+
+
+def load_plotting_backend():
+    """Configure HoloViews to use Bokeh; done once, when the first cycle plots tab is created."""
+    global _plotting_backend_loaded
+    if not _plotting_backend_loaded:
+        hv.extension('bokeh')
+        _plotting_backend_loaded = True
 
 
 class CyclePlotsTab(param.Parameterized):
@@ -75,6 +88,7 @@ class CyclePlotsTab(param.Parameterized):
 
     # Advanced options
     use_datashader = param.Boolean(default=True, doc="Use datashader for rendering large datasets")
+    progressive = param.Boolean(default=True, doc="Draw each cell as soon as its cycle data arrives")
     show_grid = param.Boolean(default=True, doc="Show grid lines")
     show_legend = param.Boolean(default=True, doc="Show legend")
     legend_position = param.Selector(
@@ -84,8 +98,21 @@ class CyclePlotsTab(param.Parameterized):
     )
 
     def __init__(self, **params):
+        load_plotting_backend()
         super().__init__(**params)
         self.cycle_data = None
+        self.is_overview = False
+        # Incremented per load; callbacks of superseded loads are ignored
+        self._load_generation = 0
+        self._cancel_event = None
+        self._doc = None
+        # Progressive rendering: cells received so far and the buffer feeding the preview plot
+        self._streamed_cells = set()
+        self._stream_buffer = None
+        # Colors of the cells of the load in progress and of the plotted cycle data, both
+        # assigned from the selected cells, so the preview and final plot agree
+        self._load_colors = {}
+        self.cell_color_map = {}
         self.groups = []
         self.group_colors = {}
 
@@ -95,6 +122,12 @@ class CyclePlotsTab(param.Parameterized):
         print("Advanced button exists:", hasattr(self, 'advanced_settings_button'))
         print("Series button exists:", hasattr(self, 'series_settings_button'))
 
+        # Loading progress, shown while cycle data is being fetched
+        self.load_progress = pn.indicators.Progress(value=0, max=100, width=400)
+        self.load_status = pn.pane.Markdown("", styles={"color": "#333"})
+        self.cancel_load_button = pn.widgets.Button(name="Cancel", button_type="danger", width=100, icon="x")
+        self.cancel_load_button.on_click(self.cancel_load)
+
         # Plot container
         self.plot_container = pn.Column(
             pn.pane.Markdown("No cells selected. Please select cells in the Cell Selector tab.")
@@ -164,6 +197,23 @@ class CyclePlotsTab(param.Parameterized):
                         # Default fallback
                         self.group_colors[group_str] = Category10[10][i % 10]
 
+    def get_palette(self):
+        """Colors of the current theme as a list (Category10 for themes that are not lists)."""
+        if self.color_theme == 'Category20':
+            return list(Category20[20])
+        return list(Category10[10])
+
+    def cell_colors(self, cell_ids):
+        """Map each cell ID, as a string, to a color by its position among the sorted ``cell_ids``.
+
+        Numeric IDs sort numerically, so cells keep their color however the load order goes
+        and the order matches the sorted legend of the final ``by='cell_id'`` plot.
+        """
+        palette = self.get_palette()
+        keys = sorted({str(cell_id) for cell_id in cell_ids},
+                      key=lambda key: (not key.isdigit(), int(key) if key.isdigit() else 0, key))
+        return {key: palette[i % len(palette)] for i, key in enumerate(keys)}
+
     def create_plot_controls(self):
         """Create the UI elements for plot controls"""
         # Basic controls (will always be visible in sidebar)
@@ -208,9 +258,19 @@ class CyclePlotsTab(param.Parameterized):
             icon="download"
         )
 
+        # Shown while an overview (sampled) load is displayed
+        self.full_resolution_button = pn.widgets.Button(
+            name="Load Full Resolution",
+            button_type="warning",
+            width=200,
+            icon="zoom-in",
+            visible=False
+        )
+
         # Action buttons container
         self.action_buttons = pn.Column(
             pn.pane.Markdown("## Actions", styles={"margin-bottom": "5px"}),
+            pn.Row(self.full_resolution_button, margin=(0, 0, 5, 0)),
             pn.Row(self.advanced_settings_button, margin=(0, 0, 5, 0)),
             pn.Row(self.series_settings_button, margin=(0, 0, 5, 0)),
             pn.pane.Markdown("## Export", styles={"margin-bottom": "5px"}),
@@ -238,6 +298,8 @@ class CyclePlotsTab(param.Parameterized):
 
         self.series_settings_button.on_click(self.open_series_settings)
 
+        self.full_resolution_button.on_click(self.load_full_resolution)
+
         self.export_png_button.on_click(self.export_png)
         self.export_svg_button.on_click(self.export_svg)
 
@@ -346,6 +408,7 @@ class CyclePlotsTab(param.Parameterized):
         self.selected_cell_metadata = cell_data
 
         if not cell_ids:
+            self.cancel_load()
             self.cycle_data = None
             self.plot_container.clear()
             self.plot_container.append(pn.pane.Markdown(
@@ -354,15 +417,152 @@ class CyclePlotsTab(param.Parameterized):
             ))
             return
 
+        # Large selections start with a sampled overview
+        self.load_cycle_data(overview=len(cell_ids) >= CYCLE_OVERVIEW_MIN_CELLS)
+
+    def load_full_resolution(self, event=None):
+        """Replace the overview with every cycle of the selected cells."""
+        if self.selected_cell_ids:
+            self.load_cycle_data(overview=False)
+
+    def load_cycle_data(self, overview=False):
+        """Load cycle data for the selected cells, as a sampled overview or at full resolution.
+
+        When served, the load runs on a background thread so the session stays responsive;
+        progress and the result are applied on the session's document. A load still running
+        is cancelled first, so a newer selection (or a double click) never loads twice.
+        """
+        self.cancel_load()
+        self._load_generation += 1
+        generation = self._load_generation
+        cancel_event = threading.Event()
+        self._cancel_event = cancel_event
+
+        cell_ids = list(self.selected_cell_ids)
+        cell_data = self.selected_cell_metadata
+        label = "cycle data overview" if overview else "cycle data"
+
         # Show loading indicator
+        self.load_progress.value = 0
+        self.load_status.object = f"Loading {label} for {len(cell_ids)} cells..."
         self.plot_container.clear()
-        self.plot_container.append(pn.indicators.Progress(active=True, value=50, width=400))
-        self.plot_container.append(pn.pane.Markdown("Loading cycle data...", styles={"color": "#333"}))
+        self.plot_container.append(self.load_progress)
+        self.plot_container.append(pn.Row(self.load_status, self.cancel_load_button))
+
+        self._doc = pn.state.curdoc
+        served = self._doc is not None and self._doc.session_context is not None
+
+        # Progressive mode: a preview plot fed through a Buffer shows each cell as it lands.
+        # The buffer sends only the newly arrived points to the browser, not the whole plot.
+        on_frames = None
+        self._streamed_cells = set()
+        self._load_colors = self.cell_colors(cell_ids)
+        if self.progressive and served:
+            empty = {"x": np.array([], dtype=float), "y": np.array([], dtype=float),
+                     "cell_id": np.array([], dtype=object)}
+            # Keep every point; the preview is replaced by the full plot once the load finishes
+            self._stream_buffer = hv.streams.Buffer(empty, length=sys.maxsize)
+            preview = hv.DynamicMap(self._stream_points, streams=[self._stream_buffer])
+            self.plot_container.append(pn.pane.HoloViews(preview))
+
+            def on_frames(frames):
+                self._schedule(partial(self._stream_frames_arrived, generation, frames))
+
+        def progress(done, total):
+            self._schedule(partial(self._show_load_progress, generation, done, total, label))
+
+        def run():
+            try:
+                cycle_data = get_cycle_data(cell_ids, cell_data, overview=overview,
+                                            progress=progress, cancel_event=cancel_event,
+                                            on_frames=on_frames)
+            except CycleLoadCancelled:
+                print(f"Cancelled cycle load for {len(cell_ids)} cells")
+                return
+            except Exception as e:
+                self._schedule(partial(self._show_load_error, generation, e))
+                return
+            self._schedule(partial(self._finish_load, generation, cycle_data, overview))
+
+        if served:
+            threading.Thread(target=run, name="cycle-load", daemon=True).start()
+        else:
+            run()
 
-        # Fetch cycle data
-        self.cycle_data = get_cycle_data(cell_ids)
-        # print(self.cycle_data.shape)
-        # print(self.cycle_data.head())
+    def cancel_load(self, event=None):
+        """Cancel the cycle load in progress, if any."""
+        if self._cancel_event is None or self._cancel_event.is_set():
+            return
+        self._cancel_event.set()
+        self._load_generation += 1
+        if event is not None:
+            # Cancelled from the button
+            self.plot_container.clear()
+            self.plot_container.append(pn.pane.Markdown(
+                "Loading cancelled.", styles={"color": "#666", "font-style": "italic"}
+            ))
+
+    def _schedule(self, callback):
+        """Run ``callback`` on this session's document, or directly when not served."""
+        if self._doc is not None and self._doc.session_context is not None:
+            self._doc.add_next_tick_callback(callback)
+        else:
+            callback()
+
+    def _show_load_progress(self, generation, done, total, label):
+        if generation != self._load_generation:
+            return
+        self.load_progress.value = int(100 * done / total) if total else 100
+        self.load_status.object = f"Loading {label}: {done} of {total} cells"
+
+    def _stream_frames_arrived(self, generation, frames):
+        """Send the points of newly loaded cell frames to the preview plot."""
+        if generation != self._load_generation or self._stream_buffer is None:
+            return
+        chunk = {"x": [], "y": [], "cell_id": []}
+        for cell_id, frame in frames.items():
+            if frame is None or frame.is_empty():
+                continue
+            # Normalization is per cell, so each frame can be normalized on its own
+            frame = normalize_cycle_data(frame)
+            x = self.x_axis if self.x_axis in frame.columns else "cycle_number"
+            y = self.y_axis if self.y_axis in frame.columns else "discharge_capacity"
+            if x not in frame.columns or y not in frame.columns:
+                continue
+            key = str(cell_id)
+            self._streamed_cells.add(key)
+            chunk["x"].append(frame[x].cast(pl.Float64).to_numpy())
+            chunk["y"].append(frame[y].cast(pl.Float64).to_numpy())
+            chunk["cell_id"].append(np.full(frame.height, key, dtype=object))
+        if chunk["x"]:
+            self._stream_buffer.send({name: np.concatenate(arrays) for name, arrays in chunk.items()})
+
+    def _stream_points(self, data):
+        """Build the preview plot from the buffered points, colored by cell with a legend."""
+        points = hv.Scatter(data, kdims=[("x", self.x_axis)], vdims=[("y", self.y_axis), "cell_id"])
+        return points.opts(color="cell_id", cmap=self._load_colors, size=4,
+                           height=self.plot_height, width=self.plot_width, show_grid=self.show_grid,
+                           show_legend=self.show_legend, legend_position=self.legend_position,
+                           title=f"Loading... {len(self._streamed_cells)} cells so far")
+
+    def _show_load_error(self, generation, error):
+        if generation != self._load_generation:
+            return
+        self._cancel_event = None
+        self.plot_container.clear()
+        self.plot_container.append(pn.pane.Alert(f"Error loading cycle data: {error}", alert_type="danger"))
+
+    def _finish_load(self, generation, cycle_data, overview):
+        """Apply a completed load, unless a newer load or a cancellation superseded it."""
+        if generation != self._load_generation:
+            return
+        self._cancel_event = None
+        self._stream_buffer = None
+        self._streamed_cells = set()
+        self.cell_color_map = self._load_colors
+        self.cycle_data = cycle_data
+        self.is_overview = overview
+        self.full_resolution_button.visible = overview
 
         if self.cycle_data is None or self.cycle_data.is_empty():
             self.plot_container.clear()
@@ -450,7 +650,7 @@ class CyclePlotsTab(param.Parameterized):
         categorical_cols = [
             col for col in self.cycle_data.columns
             if (col not in ['cell_id', 'cell_name'] and
-                self.cycle_data[col].dtype in [pl.Utf8, pl.String]) or
+                self.cycle_data[col].dtype in [pl.Utf8, pl.String, pl.Categorical]) or
                col in ['cell_id', 'cell_name']
         ]
 
@@ -599,6 +799,15 @@ class CyclePlotsTab(param.Parameterized):
             plot_kwargs['rasterize'] = True
         # Inside update_plot before creating the plot
 
+        # Give each cell the same color it had in the progressive preview. The colors were
+        # assigned from the selected cells, so cells that returned no rows are skipped
+        # rather than shifting the colors of the cells after them.
+        if self.group_by == 'cell_id' and self.color_theme in ('default', 'Category10', 'Category20'):
+            plotted = {str(cell_id) for cell_id in self.cycle_data['cell_id'].unique().to_list()}
+            colors = self.cell_color_map or self.cell_colors(plotted)
+            plot_kwargs['color'] = [color for cell_id, color in colors.items() if cell_id in plotted]
+            plot_kwargs.pop('cmap')
+
         # print(plot_kwargs)
         plot_kwargs = self.apply_series_stylings(plot_kwargs)
         print(plot_kwargs)
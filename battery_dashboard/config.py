@@ -10,13 +10,93 @@ REDASH_API_KEY=os.getenv("REDASH_API_KEY")
 CELL_QUERY_ID=os.getenv("CELL_QUERY_ID", 24)
 CYCLE_QUERY_ID=os.getenv("CYCLE_QUERY_ID", 28)
 ML_CYCLE_QUERY_ID=os.getenv("ML_CYCLE_QUERY_ID", 43)
+CYCLE_DELTA_QUERY_ID=os.getenv("CYCLE_DELTA_QUERY_ID", 29)
+CELL_DELTA_QUERY_ID=os.getenv("CELL_DELTA_QUERY_ID", 30)
+CYCLE_OPTIONS_QUERY_ID=os.getenv("CYCLE_OPTIONS_QUERY_ID", 32)
+CATALOG_QUERY_ID=os.getenv("CATALOG_QUERY_ID", 31)
+
+# Redash Client Configuration
+REDASH_TIMEOUT=float(os.getenv("REDASH_TIMEOUT", 60))
+REDASH_POOL_SIZE=int(os.getenv("REDASH_POOL_SIZE", 16))
+REDASH_MAX_RETRIES=int(os.getenv("REDASH_MAX_RETRIES", 3))
+REDASH_BACKOFF_BASE=float(os.getenv("REDASH_BACKOFF_BASE", 0.5))
+REDASH_BACKOFF_MAX=float(os.getenv("REDASH_BACKOFF_MAX", 10))
+REDASH_CIRCUIT_THRESHOLD=int(os.getenv("REDASH_CIRCUIT_THRESHOLD", 5))
+REDASH_CIRCUIT_COOLDOWN=float(os.getenv("REDASH_CIRCUIT_COOLDOWN", 30))
+# Result transport: "json", "stream" or "csv"; QUERY_TRANSPORTS overrides it per query, e.g. "28:csv,24:stream"
+REDASH_TRANSPORT=os.getenv("REDASH_TRANSPORT", "json")
+QUERY_TRANSPORTS=dict(item.split(":", 1) for item in os.getenv("QUERY_TRANSPORTS", "").split(",") if ":" in item)
+# Oldest Redash-side cached result (seconds) to accept instead of re-running a query;
+# QUERY_MAX_AGES overrides it per query, e.g. "24:3600,28:600"
+REDASH_MAX_AGE=int(os.getenv("REDASH_MAX_AGE", 300))
+QUERY_MAX_AGES={query_id: int(max_age) for query_id, max_age in
+                (item.split(":", 1) for item in os.getenv("QUERY_MAX_AGES", "").split(",") if ":" in item)}
+REDASH_JOB_TIMEOUT=float(os.getenv("REDASH_JOB_TIMEOUT", 300))
+REDASH_JOB_POLL_INTERVAL=float(os.getenv("REDASH_JOB_POLL_INTERVAL", 0.5))
+REDASH_JOB_POLL_MAX_INTERVAL=float(os.getenv("REDASH_JOB_POLL_MAX_INTERVAL", 5))
 
 # Application Configuration
 LOG_LEVEL=os.getenv("LOG_LEVEL", "INFO")
 LOG_FILE=os.getenv("LOG_FILE", "battery_dashboard.log")
 DEBUG=os.getenv("DEBUG", False)
-CACHE_TTL=os.getenv("CACHE_TTL", 300)
-MAX_CACHE_SIZE=os.getenv("MAX_CACHE_SIZE", 100)
+CACHE_TTL=int(os.getenv("CACHE_TTL", 300))
+MAX_CACHE_SIZE=int(os.getenv("MAX_CACHE_SIZE", 1000))
+MAX_CACHE_BYTES=int(os.getenv("MAX_CACHE_BYTES", 1024 ** 3))
+DISK_CACHE_ENABLED=os.getenv("DISK_CACHE_ENABLED", "true").lower() == "true"
+DISK_CACHE_DIR=os.getenv("DISK_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "battery_dashboard"))
+DISK_CACHE_TTL=int(os.getenv("DISK_CACHE_TTL", 3600))
+# Print import and initialization timings while the app starts up
+STARTUP_PROFILE=os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+
+# Cell Catalog
+# With pushdown the catalog query filters rows and projects columns in the database
+CATALOG_PUSHDOWN=os.getenv("CATALOG_PUSHDOWN", "true").lower() == "true"
+CATALOG_MIN_CYCLES=int(os.getenv("CATALOG_MIN_CYCLES", 5))
+# Comma separated catalog columns to load; empty (the default) loads all of them. The catalog
+# is shared by every session, so a projection must keep every column the dashboard reads:
+# the table columns, the search and filter columns, and total_active_mass_g for the
+# specific capacity and energy plots
+CATALOG_COLUMNS=[col.strip() for col in os.getenv("CATALOG_COLUMNS", "").split(",") if col.strip()]
+# Seconds between delta refreshes of the shared cell catalog (0 disables them)
+CATALOG_REFRESH_INTERVAL=int(os.getenv("CATALOG_REFRESH_INTERVAL", 300))
+# Compiled cell search queries kept in memory
+SEARCH_CACHE_SIZE=int(os.getenv("SEARCH_CACHE_SIZE", 256))
+# Search while typing, after the input has been idle for SEARCH_DEBOUNCE_MS milliseconds
+SEARCH_AS_YOU_TYPE=os.getenv("SEARCH_AS_YOU_TYPE", "true").lower() == "true"
+# Short enough that results follow typing within ~100 ms; raise it if every keystroke
+# searching costs too much on a large catalog
+SEARCH_DEBOUNCE_MS=int(os.getenv("SEARCH_DEBOUNCE_MS", 70))
+# Rows per page of the cell table; only the current page is sent to the browser
+TABLE_PAGE_SIZE=int(os.getenv("TABLE_PAGE_SIZE", 50))
+
+# Cycle Data Loading
+CYCLE_BATCHED_FETCH=os.getenv("CYCLE_BATCHED_FETCH", "true").lower() == "true"
+CYCLE_BATCH_SIZE=int(os.getenv("CYCLE_BATCH_SIZE", 50))
+CYCLE_BATCH_MAX_ROWS=int(os.getenv("CYCLE_BATCH_MAX_ROWS", 200000))
+MAX_CONCURRENT_REQUESTS=int(os.getenv("MAX_CONCURRENT_REQUESTS", 8))
+# Overview loads: projected columns, cycle types (empty for all) and sampling ("log", "stride" or "all")
+CYCLE_OVERVIEW_COLUMNS=[col.strip() for col in os.getenv(
+    "CYCLE_OVERVIEW_COLUMNS",
+    "cell_id,cell_name,cycle_number,regular_cycle_number,cycle_type,charge_capacity,discharge_capacity,"
+    "coulombic_efficiency,energy_efficiency,charge_energy,discharge_energy").split(",") if col.strip()]
+CYCLE_OVERVIEW_TYPES=[t.strip() for t in os.getenv("CYCLE_OVERVIEW_TYPES", "").split(",") if t.strip()]
+CYCLE_OVERVIEW_SAMPLING=os.getenv("CYCLE_OVERVIEW_SAMPLING", "log")
+CYCLE_OVERVIEW_STRIDE=int(os.getenv("CYCLE_OVERVIEW_STRIDE", 10))
+CYCLE_OVERVIEW_POINTS=int(os.getenv("CYCLE_OVERVIEW_POINTS", 200))
+# Selections of at least this many cells load an overview first
+CYCLE_OVERVIEW_MIN_CELLS=int(os.getenv("CYCLE_OVERVIEW_MIN_CELLS", 50))
+# Background prefetch of cycle data for cells being checked in the cell selector
+CYCLE_PREFETCH=os.getenv("CYCLE_PREFETCH", "true").lower() == "true"
+CYCLE_PREFETCH_WORKERS=int(os.getenv("CYCLE_PREFETCH_WORKERS", 2))
+CYCLE_PREFETCH_BATCH_SIZE=int(os.getenv("CYCLE_PREFETCH_BATCH_SIZE", 10))
+CYCLE_PREFETCH_MAX_CELLS=int(os.getenv("CYCLE_PREFETCH_MAX_CELLS", 200))
+# Cells whose test_status is listed here only fetch cycles newer than their cached copy
+CYCLE_DELTA_SYNC=os.getenv("CYCLE_DELTA_SYNC", "true").lower() == "true"
+CYCLE_DELTA_STATUSES=set(os.getenv("CYCLE_DELTA_STATUSES", "processing").split(","))
+# Delta syncs only refresh the newest cycles, so earlier cycles the lab reprocessed are picked
+# up by a full fetch after this many delta syncs or this many seconds since the last full fetch
+CYCLE_DELTA_MAX_SYNCS=int(os.getenv("CYCLE_DELTA_MAX_SYNCS", 10))
+CYCLE_DELTA_MAX_AGE=int(os.getenv("CYCLE_DELTA_MAX_AGE", 24 * 3600))
 
 # Panel Server Configuration
 PANEL_PORT=int(os.getenv("PANEL_PORT", 8061))
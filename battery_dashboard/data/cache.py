@@ -0,0 +1,201 @@
+# battery_dashboard/data/cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+import polars as pl
+from ..config import CACHE_TTL, MAX_CACHE_SIZE, MAX_CACHE_BYTES, DISK_CACHE_DIR, DISK_CACHE_TTL
+
+
+class ResultCache:
+    """Thread-safe LRU cache for query result frames.
+
+    Entries older than ``ttl`` seconds are treated as misses by ``get`` but are kept until
+    evicted, so ``get_stale`` can still serve them when Redash is unavailable. The cache is
+    bounded both by entry count and by the total ``estimated_size()`` of the stored frames;
+    the least recently used entries are evicted first.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=MAX_CACHE_SIZE, max_bytes=MAX_CACHE_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()  # key -> (frame, stored_at, size_bytes)
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, key, ttl=None):
+        """Return the cached frame if it is younger than ``ttl`` (default: the cache TTL)."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            frame, stored_at, _ = entry
+            if time.monotonic() - stored_at >= ttl:
+                self.misses += 1
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def get_stale(self, key):
+        """Return the cached frame regardless of age, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def put(self, key, frame, age=0.0):
+        """Store a frame, evicting least recently used entries to stay within bounds.
+
+        ``age`` is how many seconds old the result already is, e.g. when it is promoted
+        from the disk cache, so it expires when the original result would.
+        """
+        size = frame.estimated_size()
+        if size > self.max_bytes:
+            print(f"Not caching {key}: {size / 1e6:.1f} MB exceeds the cache size limit")
+            self.pop(key)
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            self._entries[key] = (frame, time.monotonic() - age, size)
+            self.total_bytes += size
+
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key):
+        """Remove an entry and return its frame, or None."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self.total_bytes -= entry[2]
+            return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
+
+
+class DiskCache:
+    """Persistent cache of query results stored as compressed Parquet files.
+
+    Each result is written to ``<cache_dir>/<query_id>/<params digest>.parquet`` next to a
+    small JSON file recording when it was stored and with which parameters, so cached data
+    survives server restarts and autoreloads. Files are written to a temporary name and
+    renamed into place, so concurrent readers never see a partial file.
+    """
+
+    def __init__(self, cache_dir=DISK_CACHE_DIR, ttl=DISK_CACHE_TTL, compression="zstd"):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.compression = compression
+
+    def _paths(self, query_id, params):
+        digest = hashlib.sha1(json.dumps(params or {}, sort_keys=True, default=str).encode()).hexdigest()
+        directory = self.cache_dir / str(query_id)
+        return directory / f"{digest}.parquet", directory / f"{digest}.json"
+
+    def _read_metadata(self, meta_path):
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def scan(self, query_id, params=None, ttl=None):
+        """Return ``(lazy_frame, age)`` for the cached result if it is younger than ``ttl``.
+
+        ``age`` is the number of seconds since the result was stored. Returns None if there
+        is no fresh entry.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        data_path, meta_path = self._paths(query_id, params)
+        metadata = self._read_metadata(meta_path)
+        if metadata is None or not data_path.exists():
+            return None
+        age = max(time.time() - metadata.get("stored_at", 0), 0.0)
+        if age >= ttl:
+            return None
+        return pl.scan_parquet(data_path), age
+
+    def scan_stale(self, query_id, params=None):
+        """Return a LazyFrame over the cached result regardless of age, or None."""
+        data_path, _ = self._paths(query_id, params)
+        return pl.scan_parquet(data_path) if data_path.exists() else None
+
+    def get_result_info(self, query_id, params=None):
+        """Return the Redash result info (``id``, ``retrieved_at``) stored with a result, or None."""
+        _, meta_path = self._paths(query_id, params)
+        metadata = self._read_metadata(meta_path)
+        return metadata.get("result_info") if metadata else None
+
+    def put(self, query_id, params, frame, result_info=None):
+        """Write a result frame and its metadata to disk."""
+        data_path, meta_path = self._paths(query_id, params)
+        try:
+            data_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            tmp_data = data_path.with_name(data_path.name + tmp_suffix)
+            frame.write_parquet(tmp_data, compression=self.compression)
+            os.replace(tmp_data, data_path)
+
+            tmp_meta = meta_path.with_name(meta_path.name + tmp_suffix)
+            with open(tmp_meta, "w") as f:
+                json.dump({
+                    "query_id": str(query_id),
+                    "params": params,
+                    "stored_at": time.time(),
+                    "rows": frame.height,
+                    "result_info": result_info,
+                }, f, default=str)
+            os.replace(tmp_meta, meta_path)
+        except OSError as e:
+            print(f"Could not write disk cache entry for query {query_id}: {e}")
+
+    def pop(self, query_id, params=None):
+        """Delete a cached result if present."""
+        for path in self._paths(query_id, params):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
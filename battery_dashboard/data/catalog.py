@@ -0,0 +1,284 @@
+# battery_dashboard/data/catalog.py
+import threading
+import numpy as np
+import param
+import polars as pl
+from ..api.redash import RedashError
+from ..config import CATALOG_REFRESH_INTERVAL
+from ..utils.profiling import startup_profiler
+from .indexes import FilterIndex, SEARCH_COLUMN, build_search_blob
+from .loaders import (load_initial_data, fetch_cell_catalog_delta, filter_cell_catalog, catalog_query,
+                      store_result)
+
+# Columns whose latest value marks how recent the catalog is
+WATERMARK_COLUMNS = ("last_processed_timestamp", "test_start_date")
+
+
+class CatalogSnapshot:
+    """One immutable version of the catalog data.
+
+    A refresh never modifies a snapshot; it builds a new frame and publishes a new
+    snapshot, so sessions can keep reading the one they hold without locking or copying.
+    """
+
+    __slots__ = ("version", "data", "_filter_index", "_search_blob", "_sort_orders", "_index_lock")
+
+    def __init__(self, version, data):
+        self.version = version
+        self.data = data
+        self._filter_index = None
+        self._search_blob = None
+        self._sort_orders = {}  # (column, descending) -> row positions in sorted order
+        self._index_lock = threading.Lock()
+
+    def view(self):
+        """Return a view over all rows of this snapshot."""
+        return CatalogView(self)
+
+    def filter_index(self):
+        """Return the snapshot's ``FilterIndex``, building it on first use."""
+        if self._filter_index is None:
+            with self._index_lock:
+                if self._filter_index is None:
+                    self._filter_index = FilterIndex(self.data)
+        return self._filter_index
+
+    def search_blob(self):
+        """Return the snapshot's lowercase free-text search column, building it on first use."""
+        if self._search_blob is None:
+            with self._index_lock:
+                if self._search_blob is None:
+                    self._search_blob = build_search_blob(self.data)
+        return self._search_blob
+
+    def sort_order(self, column, descending=False):
+        """Row positions of the data sorted by ``column`` (nulls last), cached per column.
+
+        Raises ``ValueError`` for unknown and nested (list/struct) columns, which cannot be
+        sorted.
+        """
+        key = (column, descending)
+        order = self._sort_orders.get(key)
+        if order is None:
+            if not self.is_sortable(column):
+                raise ValueError(f"Column '{column}' cannot be sorted")
+            values = self.data[column]
+            if values.dtype == pl.Categorical:
+                values = values.cast(pl.Utf8)  # Sort categories by name
+            order = values.arg_sort(descending=descending, nulls_last=True).to_numpy()
+            with self._index_lock:
+                self._sort_orders[key] = order
+        return order
+
+    def is_sortable(self, column):
+        """True if ``column`` is a non-nested column of the data, like the search blob columns."""
+        dtype = self.data.schema.get(column)
+        return dtype is not None and not dtype.is_nested()
+
+    def column(self, name):
+        """Return a column of the data, or the search blob for ``SEARCH_COLUMN``."""
+        return self.search_blob() if name == SEARCH_COLUMN else self.data[name]
+
+
+class CatalogView:
+    """A subset of a snapshot's rows, held as row indices instead of a copied frame.
+
+    ``rows`` is a numpy array of row positions in ``snapshot.data`` (ascending unless the
+    view was sorted), or None for all rows. Filtering and taking rows only produce new
+    index arrays; rows are gathered into a DataFrame when ``frame()`` is called, and only
+    for the columns asked for.
+    """
+
+    __slots__ = ("snapshot", "rows")
+
+    def __init__(self, snapshot, rows=None):
+        self.snapshot = snapshot
+        self.rows = rows
+
+    @property
+    def columns(self):
+        return self.snapshot.data.columns
+
+    def __len__(self):
+        return self.snapshot.data.height if self.rows is None else len(self.rows)
+
+    def frame(self, columns=None):
+        """Gather the view's rows (and optionally only ``columns``) into a DataFrame."""
+        data = self.snapshot.data
+        if columns is not None:
+            data = data.select(columns)
+        return data if self.rows is None else data[self.rows]
+
+    def positions(self):
+        """Row positions in the snapshot data covered by this view."""
+        return np.arange(self.snapshot.data.height) if self.rows is None else self.rows
+
+    def filter_mask(self, mask):
+        """Return the view of the rows set in ``mask``, a boolean mask over the snapshot rows."""
+        if mask is None:
+            return self
+        if self.rows is None:
+            return CatalogView(self.snapshot, np.flatnonzero(mask))
+        return CatalogView(self.snapshot, self.rows[mask[self.rows]])
+
+    def filter(self, predicate):
+        """Return the view of the rows for which the Polars expression ``predicate`` holds."""
+        if not len(self):
+            return self
+        # Only the columns the predicate reads are gathered (the search blob included)
+        columns = sorted(set(predicate.meta.root_names())) or self.columns[:1]
+        frame = pl.DataFrame([self.snapshot.column(name) for name in columns])
+        if self.rows is not None:
+            frame = frame[self.rows]
+        mask = frame.select(predicate.fill_null(False)).to_series().to_numpy()
+        return CatalogView(self.snapshot, self.positions()[mask])
+
+    def row_mask(self):
+        """Boolean mask over the snapshot rows that is set for the rows of this view."""
+        mask = np.zeros(self.snapshot.data.height, dtype=bool)
+        mask[self.positions()] = True
+        return mask
+
+    def take(self, indices):
+        """Return the view of the rows at ``indices`` (positions within this view)."""
+        return CatalogView(self.snapshot, self.positions()[np.asarray(indices, dtype=np.int64)])
+
+
+class CellCatalog(param.Parameterized):
+    """Process-wide cell catalog shared by all dashboard sessions.
+
+    The catalog is loaded in full once. After that ``refresh`` only asks Redash for cells
+    reprocessed or started since the newest timestamp already held, and upserts them by
+    ``cell_id``. Every change publishes a new immutable ``CatalogSnapshot`` in one
+    assignment and bumps ``version``; sessions watch it to refresh their views. Sessions
+    reference the snapshot's frame and hold their subsets as ``CatalogView`` row indices,
+    so the catalog is stored once per process however many viewers are connected.
+    """
+
+    version = param.Integer(default=0, doc="Incremented whenever the catalog data changes")
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.snapshot = CatalogSnapshot(0, pl.DataFrame())
+        self._lock = threading.Lock()
+        # Set once the first load has finished (even if it failed and left the catalog empty)
+        self.ready = threading.Event()
+        self._stop = threading.Event()
+        self._refresh_thread = None
+
+    @property
+    def data(self):
+        """The DataFrame of the current snapshot."""
+        return self.snapshot.data
+
+    def _publish(self, data):
+        """Swap in a new snapshot built from ``data`` and notify watchers."""
+        self.snapshot = CatalogSnapshot(self.snapshot.version + 1, data)
+        self.version = self.snapshot.version
+
+    def load(self):
+        """Load the full catalog, replacing the current data."""
+        with self._lock:
+            data = load_initial_data()
+            self._publish(data)
+        self.ready.set()
+        return data
+
+    def watermark(self):
+        """Return the newest reprocessing/test start time in the catalog, or None."""
+        data = self.snapshot.data
+        latest = [data[col].max() for col in WATERMARK_COLUMNS
+                  if col in data.columns and data.schema[col] == pl.Datetime]
+        latest = [value for value in latest if value is not None]
+        return max(latest) if latest else None
+
+    def refresh(self):
+        """Upsert the cells changed since the last refresh; returns the number of changed rows.
+
+        Falls back to a full load if the catalog is empty or holds no timestamps to
+        resume from. The delta query matches ``>= since``, so the newest cells always come
+        back; a new snapshot is only published if the upsert actually changes the data.
+        """
+        since = self.watermark()
+        if self.snapshot.data.is_empty() or since is None:
+            self.load()
+            return len(self.data)
+
+        try:
+            changed = fetch_cell_catalog_delta(since)
+        except RedashError as e:
+            print(f"Error refreshing cell catalog: {e}")
+            return 0
+        if changed.is_empty() or "cell_id" not in changed.columns:
+            return 0
+
+        with self._lock:
+            current = self.snapshot.data
+            # Cast to the catalog's dtypes so unchanged rows compare equal below
+            changed = changed.select([pl.col(col).cast(current.schema[col], strict=False)
+                                      for col in current.columns if col in changed.columns])
+            unchanged = current.filter(~pl.col("cell_id").is_in(changed["cell_id"].implode()))
+            merged = pl.concat([unchanged, changed], how="diagonal_relaxed")
+            data = filter_cell_catalog(merged.sort("cell_id"))
+            if data.equals(current):
+                return 0
+            # Keep the cached full result current so restarts resume from here
+            query_id, params = catalog_query()
+            store_result(query_id, params, data)
+            self._publish(data)
+        print(f"Cell catalog refreshed: {len(changed)} changed cells, {len(data)} total")
+        return len(changed)
+
+    def start_auto_refresh(self, interval=CATALOG_REFRESH_INTERVAL):
+        """Refresh the catalog every ``interval`` seconds on a daemon thread (idempotent)."""
+        if interval <= 0 or (self._refresh_thread is not None and self._refresh_thread.is_alive()):
+            return
+        self._stop.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, args=(interval,),
+                                                name="catalog-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def stop_auto_refresh(self):
+        self._stop.set()
+
+    def _refresh_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Cell catalog refresh failed: {e}")
+
+    def _warm(self):
+        try:
+            with startup_profiler.phase("load cell catalog"):
+                self.load()
+        except Exception as e:
+            print(f"Loading the cell catalog failed: {e}")
+            self.ready.set()
+        self.start_auto_refresh()
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def warm_cell_catalog():
+    """Return the process-wide cell catalog, starting its first load in the background.
+
+    The first call starts the load on a daemon thread and returns at once; ``catalog.ready``
+    is set when the data is available.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = CellCatalog()
+                threading.Thread(target=_catalog._warm, name="catalog-warmup", daemon=True).start()
+    return _catalog
+
+
+def get_cell_catalog():
+    """Return the process-wide cell catalog, waiting for its first load to finish."""
+    catalog = warm_cell_catalog()
+    catalog.ready.wait()
+    return catalog
@@ -0,0 +1,83 @@
+# battery_dashboard/data/indexes.py
+# Indexes over one catalog snapshot. They are built once per catalog version and shared by
+# every session, so filtering the cell table does not scan the catalog.
+import numpy as np
+import polars as pl
+
+# Categorical columns the cell selector filters on
+FILTER_COLUMNS = ["design_name", "experiment_group", "layer_types", "test_status", "test_year"]
+
+# Name under which search predicates refer to the search blob of a snapshot
+SEARCH_COLUMN = "__search_text"
+# Joins the column values in the search blob; it never occurs in a search, so matches
+# cannot span two columns
+SEARCH_SEPARATOR = "\x1f"
+
+
+def build_search_blob(data):
+    """One lowercase string per row holding the text of all of its columns.
+
+    Free-text search is then a single literal ``str.contains`` over this column instead of
+    casting and scanning every column of the catalog on every search.
+    """
+    columns = [pl.col(name).cast(pl.Utf8).fill_null("")
+               for name, dtype in data.schema.items() if not dtype.is_nested()]
+    if not columns:
+        return pl.Series(SEARCH_COLUMN, [""] * data.height, dtype=pl.Utf8)
+    return data.select(pl.concat_str(columns, separator=SEARCH_SEPARATOR)
+                       .str.to_lowercase().alias(SEARCH_COLUMN)).to_series()
+
+
+class FilterIndex:
+    """Inverted index from each value of the filter columns to the rows holding it.
+
+    Values are indexed by their string form, as shown in the filter widgets; nulls are not
+    indexed. For every column the index keeps the sorted widget options and, per value, the
+    row positions holding it. A selection of several values for a column (an IN filter)
+    sets the rows of each value in a boolean row mask, and the masks of the filtered columns
+    are ANDed, so a filter costs the size of the matching rows rather than a catalog scan.
+    """
+
+    def __init__(self, data, columns=FILTER_COLUMNS):
+        self.size = data.height
+        self.options = {}   # column -> sorted values
+        self.postings = {}  # column -> {value: row positions}
+        for column in columns:
+            if column not in data.columns:
+                continue
+            groups = (data.select(pl.col(column).cast(pl.Utf8).alias("value"))
+                      .with_row_index("row")
+                      .drop_nulls("value")
+                      .group_by("value")
+                      .agg(pl.col("row"))
+                      .sort("value"))
+            values = groups["value"].to_list()
+            self.options[column] = values
+            self.postings[column] = {value: rows.to_numpy() for value, rows in zip(values, groups["row"])}
+
+    def column_mask(self, column, values):
+        """Boolean row mask of the rows whose ``column`` is any of ``values``."""
+        mask = np.zeros(self.size, dtype=bool)
+        postings = self.postings.get(column, {})
+        for value in values:
+            rows = postings.get(value)
+            if rows is not None:
+                mask[rows] = True
+        return mask
+
+    def mask(self, selections):
+        """Boolean row mask for ``{column: [values]}``, or None if nothing is selected.
+
+        Columns are ANDed, the values of one column ORed. Columns that are not indexed
+        are ignored.
+        """
+        mask = None
+        for column, values in selections.items():
+            if not values or column not in self.postings:
+                continue
+            column_mask = self.column_mask(column, values)
+            if mask is None:
+                mask = column_mask
+            else:
+                mask &= column_mask
+        return mask
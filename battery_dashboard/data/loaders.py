@@ -1,104 +1,604 @@
 # # battery_dashboard/data/loaders.py
+import re
+import threading
+import time
 import polars as pl
-import requests
-from datetime import datetime
-from ..config import REDASH_URL, REDASH_API_KEY, CELL_QUERY_ID, CYCLE_QUERY_ID
-# Cache for query results
-query_cache = {}
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ..api.redash import RedashError, get_redash_client
+from ..config import (CELL_QUERY_ID, CELL_DELTA_QUERY_ID, CATALOG_QUERY_ID,
+                      CATALOG_PUSHDOWN, CATALOG_MIN_CYCLES, CATALOG_COLUMNS,
+                      CYCLE_QUERY_ID, CYCLE_DELTA_QUERY_ID, CYCLE_OPTIONS_QUERY_ID,
+                      CYCLE_BATCHED_FETCH, CYCLE_BATCH_SIZE, CYCLE_BATCH_MAX_ROWS,
+                      CYCLE_DELTA_SYNC, CYCLE_DELTA_STATUSES, CYCLE_DELTA_MAX_SYNCS, CYCLE_DELTA_MAX_AGE,
+                      CYCLE_OVERVIEW_COLUMNS, CYCLE_OVERVIEW_TYPES, CYCLE_OVERVIEW_SAMPLING,
+                      CYCLE_OVERVIEW_STRIDE, CYCLE_OVERVIEW_POINTS,
+                      MAX_CONCURRENT_REQUESTS, DISK_CACHE_ENABLED)
+from ..utils.concurrency import SingleFlight, ActivityCounter
+from .cache import ResultCache, DiskCache
+from .transports import FETCHERS, get_query_transport, get_query_max_age
+from .transforms import normalize_cycle_data
+
+# Cache for query results, bounded by CACHE_TTL, MAX_CACHE_SIZE and MAX_CACHE_BYTES
+query_cache = ResultCache()
+# Parquet copy of every result so restarts start warm
+disk_cache = DiskCache() if DISK_CACHE_ENABLED else None
+# Concurrent requests for the same query and parameters share one Redash call
+inflight_requests = SingleFlight()
+# Redash query_result id/retrieved_at of the last stored result, per cache key
+result_versions = {}
+# Cycle loads a user is waiting for; background prefetching pauses while any are running
+interactive_loads = ActivityCounter()
+# Thread pool running the cycle queries of all loads, so MAX_CONCURRENT_REQUESTS bounds the
+# Redash queries in flight for the whole process rather than per load
+_cycle_executor = None
+_cycle_executor_lock = threading.Lock()
+
+# Row estimate for cells without a total_cycles value in the metadata
+DEFAULT_ROWS_PER_CELL = 1000
+
+class CycleLoadCancelled(Exception):
+    """Raised by cycle loads whose ``cancel_event`` was set."""
+
+
+# Catalog columns always loaded: the key, the min-cycles filter, delta sync and the
+# catalog refresh watermark depend on them
+CATALOG_REQUIRED_COLUMNS = ["cell_id", "total_cycles", "test_status",
+                            "last_processed_timestamp", "test_start_date"]
+# Cycle columns the loader needs to split batches and delta-sync
+CYCLE_REQUIRED_COLUMNS = ["cell_id", "cycle_number"]
+COLUMN_NAME_PATTERN = re.compile(r"^[a-z_][a-z0-9_]*$")
+CYCLE_SAMPLINGS = ("all", "stride", "log")
+
+
+def make_cache_key(query_id, params=None):
+    """Build the cache key used for a query/parameter combination."""
+    return f"{query_id}_{str(params)}"
+
+
+def fetch_query_result(query_id, params=None, transport=None, known_result_id=None):
+    """Run a Redash query and return ``(frame, info)``, bypassing the cache.
+
+    ``transport`` is one of "json", "stream" or "csv" and defaults to the one configured
+    for the query. Redash may answer from its own result cache if it holds a result
+    younger than the query's max_age; slow queries are polled until their job finishes.
+    ``info`` carries the Redash ``id``/``retrieved_at`` of the result. ``frame`` is None if
+    the result id equals ``known_result_id``. Raises ``RedashError`` if Redash is
+    unreachable or returns no result.
+    """
+    transport = transport or get_query_transport(query_id)
+    return FETCHERS[transport](get_redash_client(), query_id, params,
+                               max_age=get_query_max_age(query_id), known_result_id=known_result_id)
+
+
+def fetch_query_frame(query_id, params=None, transport=None):
+    """Run a Redash query and return its rows as a DataFrame, bypassing the cache."""
+    return fetch_query_result(query_id, params, transport)[0]
+
+
+def _validate_columns(columns):
+    invalid = [col for col in columns if not COLUMN_NAME_PATTERN.match(col)]
+    if invalid:
+        raise ValueError(f"Invalid column names: {invalid}")
+    return columns
+
+
+def cycle_query_options(columns=None, cycle_types=None, sampling="all", stride=CYCLE_OVERVIEW_STRIDE,
+                        log_points=CYCLE_OVERVIEW_POINTS):
+    """Build the parameters selecting columns, cycle types and sampling for cycle queries.
+
+    ``sampling`` is "all", "stride" (every ``stride``-th cycle) or "log" (about
+    ``log_points`` log-spaced cycles per cell). Returns None when nothing is restricted,
+    meaning the full-resolution cycle query is used.
+    """
+    if sampling not in CYCLE_SAMPLINGS:
+        raise ValueError(f"Unknown cycle sampling '{sampling}', expected one of {CYCLE_SAMPLINGS}")
+    if not columns and not cycle_types and sampling == "all":
+        return None
+
+    if columns:
+        columns = _validate_columns(list(dict.fromkeys(CYCLE_REQUIRED_COLUMNS + list(columns))))
+    return {
+        "columns": ", ".join(columns) if columns else "cycles.*",
+        "cycle_types": ",".join(str(t).replace("'", "''") for t in cycle_types or []),
+        "stride": int(stride) if sampling == "stride" else 1,
+        "log_points": int(log_points) if sampling == "log" else 0,
+    }
+
+
+def overview_cycle_options():
+    """Cycle query options for overview loads, from the CYCLE_OVERVIEW_* settings."""
+    return cycle_query_options(CYCLE_OVERVIEW_COLUMNS, CYCLE_OVERVIEW_TYPES, CYCLE_OVERVIEW_SAMPLING)
+
+
+def cycle_query_id(options=None):
+    """The cycle query to run: the full-resolution query, or the options query."""
+    return CYCLE_QUERY_ID if not options else CYCLE_OPTIONS_QUERY_ID
+
+
+def cycle_params(cell_id, options=None):
+    """Parameters of the single-cell cycle query for ``cell_id``."""
+    return {"cell_ids": str(cell_id), **(options or {})}
+
+
+def _collect_disk_result(lazy_frame, query_id):
+    try:
+        return lazy_frame.collect()
+    except (OSError, pl.exceptions.PolarsError) as e:
+        print(f"Ignoring unreadable disk cache entry for query {query_id}: {e}")
+        return None
+
+
+def load_cached_result(query_id, params=None, cache_ttl=None):
+    """Return a fresh cached result from memory, falling back to the disk cache, or None.
+
+    Both caches are checked against the same TTL (default: the memory cache's), and a
+    result promoted from disk keeps its age, so it expires when it would have in memory.
+    """
+    cache_key = make_cache_key(query_id, params)
+    cache_ttl = query_cache.ttl if cache_ttl is None else cache_ttl
+    cached_result = query_cache.get(cache_key, ttl=cache_ttl)
+    if cached_result is not None:
+        return cached_result
+
+    if disk_cache is not None:
+        disk_result = disk_cache.scan(query_id, params, ttl=cache_ttl)
+        if disk_result is not None:
+            lazy_result, age = disk_result
+            df = _collect_disk_result(lazy_result, query_id)
+            if df is not None:
+                query_cache.put(cache_key, df, age=age)
+                return df
+    return None
+
+
+def load_stale_result(query_id, params=None):
+    """Return the last stored result regardless of age, or None."""
+    stale_result = query_cache.get_stale(make_cache_key(query_id, params))
+    if stale_result is None and disk_cache is not None:
+        lazy_result = disk_cache.scan_stale(query_id, params)
+        if lazy_result is not None:
+            stale_result = _collect_disk_result(lazy_result, query_id)
+    return stale_result
+
+
+def store_result(query_id, params, df, result_info=None):
+    """Store a result in the memory cache and the disk cache."""
+    cache_key = make_cache_key(query_id, params)
+    query_cache.put(cache_key, df)
+    if result_info is not None:
+        result_versions[cache_key] = result_info
+    else:
+        # The frame no longer matches a Redash result we could compare against
+        result_versions.pop(cache_key, None)
+    if disk_cache is not None:
+        disk_cache.put(query_id, params, df, result_info)
+
+
+def get_result_version(query_id, params=None):
+    """Return the Redash result info of the last stored result, or None."""
+    result_info = result_versions.get(make_cache_key(query_id, params))
+    if result_info is None and disk_cache is not None:
+        result_info = disk_cache.get_result_info(query_id, params)
+    return result_info
+
+
+def _fetch_and_store(query_id, params, cache_ttl, transport):
+    # A caller that missed the cache just before the previous flight finished
+    # can be served from the cache without going back to Redash
+    cached_result = load_cached_result(query_id, params, cache_ttl)
+    if cached_result is not None:
+        return cached_result
+
+    # If Redash still holds the result we stored last, reuse our copy instead of
+    # downloading and parsing it again; the copy is only read once the ids match
+    known_result = get_result_version(query_id, params) or {}
+    known_result_id = known_result.get("id")
+
+    df, result_info = fetch_query_result(query_id, params, transport, known_result_id)
+    if df is None:
+        df = load_stale_result(query_id, params)
+        if df is None:
+            # Our copy was evicted or deleted in the meantime
+            df, result_info = fetch_query_result(query_id, params, transport)
+        else:
+            print(f"Query {query_id} result {known_result_id} is unchanged, reusing cached copy")
+            result_info = {**known_result, **result_info}
+    if "fetched_at" not in result_info:
+        result_info = {**result_info, "fetched_at": time.time()}
+    store_result(query_id, params, df, result_info)
+    return df
 
 
 # Fetch Redash query results
-def get_redash_query_results(query_id, params=None, cache_ttl=300):
-    """Fetch results from a Redash query with caching."""
-    cache_key = f"{query_id}_{str(params)}"
+def get_redash_query_results(query_id, params=None, cache_ttl=None, transport=None):
+    """Fetch results from a Redash query with caching.
 
+    Results are looked up in memory, then on disk, before Redash is queried. Concurrent
+    callers for the same query and parameters wait for a single Redash request. If Redash
+    fails, the last good cached result is served even if it has expired.
+    """
     # Check cache
-    if cache_key in query_cache:
-        cached_result, timestamp = query_cache[cache_key]
-        if (datetime.now() - timestamp).total_seconds() < cache_ttl:
-            return cached_result
+    cached_result = load_cached_result(query_id, params, cache_ttl)
+    if cached_result is not None:
+        return cached_result
 
     try:
-        api_url = f"{REDASH_URL}/api/queries/{query_id}/results"
-        headers = {"Authorization": f"Key {REDASH_API_KEY}", "Content-Type": "application/json"}
-        response = requests.post(api_url, headers=headers, json={"parameters": params or {}})
-        response.raise_for_status()
-
-        query_result = response.json()
-        if "query_result" in query_result and "data" in query_result["query_result"]:
-            df = pl.DataFrame(query_result["query_result"]["data"]["rows"])
-            query_cache[cache_key] = (df, datetime.now())
-            return df
-    except requests.exceptions.RequestException as e:
+        return inflight_requests.do(make_cache_key(query_id, params), _fetch_and_store,
+                                    query_id, params, cache_ttl, transport)
+    except RedashError as e:
         print(f"Error fetching data from Redash: {e}")
 
+    stale_result = load_stale_result(query_id, params)
+    if stale_result is not None:
+        print(f"Serving last good result for query {query_id}")
+        return stale_result
     return pl.DataFrame()
 
 
+def _as_list(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def catalog_query(min_cycles=CATALOG_MIN_CYCLES, columns=CATALOG_COLUMNS, test_year=None,
+                  experiment_group=None):
+    """Return the ``(query_id, params)`` that load the cell catalog.
+
+    With ``CATALOG_PUSHDOWN`` the filters and the column list become parameters of the
+    catalog query, so Redash only returns the rows and columns asked for. Otherwise the
+    full Query 24 result is loaded and filtered by ``filter_cell_catalog``.
+    """
+    if not CATALOG_PUSHDOWN:
+        return CELL_QUERY_ID, None
+
+    if columns:
+        columns = _validate_columns(list(dict.fromkeys(CATALOG_REQUIRED_COLUMNS + list(columns))))
+    params = {
+        "columns": ", ".join(columns) if columns else "*",
+        "min_cycles": int(min_cycles),
+        "test_year": ",".join(str(int(year)) for year in _as_list(test_year)),
+        "experiment_group": ",".join(str(group).replace("'", "''") for group in _as_list(experiment_group)),
+    }
+    return CATALOG_QUERY_ID, params
+
+
+def filter_cell_catalog(df, min_cycles=CATALOG_MIN_CYCLES, test_year=None, experiment_group=None):
+    """Drop cells with too few cycles to be worth plotting, plus optional year/group filters.
+
+    Cheap on a pushed-down result, which already satisfies the filters, and still needed
+    there for rows merged in by catalog delta refreshes.
+    """
+    if df.is_empty():
+        return df
+    predicates = []
+    if "total_cycles" in df.columns:
+        predicates.append(pl.col("total_cycles") > min_cycles)
+    if test_year is not None and "test_year" in df.columns:
+        years = [int(year) for year in _as_list(test_year)]
+        predicates.append(pl.col("test_year").cast(pl.Int64, strict=False).is_in(years))
+    if experiment_group is not None and "experiment_group" in df.columns:
+        groups = [str(group) for group in _as_list(experiment_group)]
+        predicates.append(pl.col("experiment_group").cast(pl.String).is_in(groups))
+    return df.filter(predicates) if predicates else df
+
+
+def load_cell_catalog(min_cycles=CATALOG_MIN_CYCLES, columns=CATALOG_COLUMNS, test_year=None,
+                      experiment_group=None):
+    """Load the cell catalog, optionally limited to some columns, test years and groups.
+
+    If the pushed-down catalog query fails or returns nothing (e.g. it does not exist on
+    this Redash instance), the full Query 24 result is loaded and filtered locally instead.
+    """
+    query_id, params = catalog_query(min_cycles, columns, test_year, experiment_group)
+    df = get_redash_query_results(query_id, params)
+    if df.is_empty() and query_id != CELL_QUERY_ID:
+        print(f"Catalog query {query_id} returned no rows, loading query {CELL_QUERY_ID} instead")
+        df = get_redash_query_results(CELL_QUERY_ID)
+        if columns and not df.is_empty():
+            wanted = dict.fromkeys(CATALOG_REQUIRED_COLUMNS + list(columns))
+            df = df.select([col for col in wanted if col in df.columns])
+    return filter_cell_catalog(df, min_cycles, test_year, experiment_group)
+
+
 # Load initial data
 def load_initial_data():
-    df = get_redash_query_results(CELL_QUERY_ID)
-    if not df.is_empty() and "total_cycles" in df.columns:
-        df = df.filter(pl.col("total_cycles") > 5)
+    df = load_cell_catalog()
 
     print(f"Initial data loaded with {len(df)} rows.")
     return df
 
 
-def get_cycle_data(cell_ids=None, cell_metadata=None):
-    """Get cycle data and join with cell metadata."""
+def fetch_cell_catalog_delta(since):
+    """Fetch the catalog rows of cells reprocessed or started at or after ``since``.
+
+    Bypasses the cache, since every call asks for a different window. Raises
+    ``RedashError`` if Redash cannot be reached.
+    """
+    return fetch_query_frame(CELL_DELTA_QUERY_ID, {"since": since.strftime("%Y-%m-%d %H:%M:%S")})
+
+
+def get_cached_cycle_frame(cell_id, cache_ttl=None, options=None):
+    """Return the cached cycle frame for a single cell, or None if missing or expired."""
+    return load_cached_result(cycle_query_id(options), cycle_params(cell_id, options), cache_ttl)
+
+
+def plan_cycle_batches(cell_ids, cell_metadata=None, batch_size=CYCLE_BATCH_SIZE,
+                       max_rows=CYCLE_BATCH_MAX_ROWS):
+    """Group cell IDs into batches so each batched query returns a bounded number of rows.
+
+    Expected rows per cell come from ``total_cycles`` in the cell metadata when available.
+    A batch is closed when it reaches ``batch_size`` cells or adding the next cell would
+    push the expected row count over ``max_rows``.
+    """
+    expected_rows = {}
+    if cell_metadata is not None and not cell_metadata.is_empty() and "total_cycles" in cell_metadata.columns:
+        for cell_id, total_cycles in cell_metadata.select(["cell_id", "total_cycles"]).iter_rows():
+            if total_cycles:
+                expected_rows[str(cell_id)] = int(total_cycles)
+
+    batches = []
+    current, current_rows = [], 0
+    for cell_id in cell_ids:
+        rows = expected_rows.get(str(cell_id), DEFAULT_ROWS_PER_CELL)
+        if current and (len(current) >= batch_size or current_rows + rows > max_rows):
+            batches.append(current)
+            current, current_rows = [], 0
+        current.append(cell_id)
+        current_rows += rows
+    if current:
+        batches.append(current)
+    return batches
+
+
+def fetch_cycle_batch(cell_ids, options=None):
+    """Fetch cycle data for several cells in one query and split it into per-cell cache entries.
+
+    Returns a dict mapping ``str(cell_id)`` to that cell's cycle frame.
+    """
+    query_id = cycle_query_id(options)
+    params = {"cell_ids": ",".join(str(cell_id) for cell_id in cell_ids), **(options or {})}
+    try:
+        # Sessions loading the same cells at the same time share the request
+        combined = inflight_requests.do(make_cache_key(query_id, params), fetch_query_frame,
+                                        query_id, params)
+    except RedashError as e:
+        # Keep whatever each cell had cached rather than caching empty frames
+        print(f"Error fetching data from Redash: {e}")
+        frames = {}
+        for cell_id in cell_ids:
+            cached = load_stale_result(query_id, cycle_params(cell_id, options))
+            frames[str(cell_id)] = cached if cached is not None else pl.DataFrame()
+        return frames
+
+    frames = {}
+    if not combined.is_empty() and "cell_id" in combined.columns:
+        for (cell_id,), frame in combined.partition_by("cell_id", as_dict=True).items():
+            frames[str(cell_id)] = frame
+
+    # Store every cell under its single-cell key so later lookups hit the cache,
+    # including cells that returned no rows
+    fetched_at = time.time()
+    for cell_id in cell_ids:
+        frame = frames.get(str(cell_id), pl.DataFrame())
+        store_result(query_id, cycle_params(cell_id, options), frame, {"fetched_at": fetched_at})
+        frames[str(cell_id)] = frame
+    return frames
+
+
+def plan_delta_cells(cell_ids, cell_metadata=None):
+    """Return ``{str(cell_id): stale frame}`` for the cells that can be delta-synced.
+
+    A cell qualifies when its ``test_status`` is in ``CYCLE_DELTA_STATUSES`` and an earlier
+    copy of its cycle data is still held in memory or on disk. Copies that have been delta
+    synced ``CYCLE_DELTA_MAX_SYNCS`` times, or whose last full fetch is older than
+    ``CYCLE_DELTA_MAX_AGE`` seconds (or unknown), are fetched in full instead, so cycles
+    reprocessed before the synced tail are eventually refreshed too.
+    """
+    if cell_metadata is None or cell_metadata.is_empty() or "test_status" not in cell_metadata.columns:
+        return {}
+
+    statuses = {str(cell_id): str(status) for cell_id, status
+                in cell_metadata.select(["cell_id", "test_status"]).iter_rows()}
+    delta_cells = {}
+    for cell_id in cell_ids:
+        if statuses.get(str(cell_id)) not in CYCLE_DELTA_STATUSES:
+            continue
+        sync_info = get_result_version(CYCLE_QUERY_ID, cycle_params(cell_id)) or {}
+        fetched_at = sync_info.get("fetched_at")
+        if (fetched_at is None or time.time() - fetched_at > CYCLE_DELTA_MAX_AGE
+                or sync_info.get("delta_syncs", 0) >= CYCLE_DELTA_MAX_SYNCS):
+            continue
+        stale = load_stale_result(CYCLE_QUERY_ID, cycle_params(cell_id))
+        if stale is not None and not stale.is_empty() and "cycle_number" in stale.columns:
+            delta_cells[str(cell_id)] = stale
+    return delta_cells
+
+
+def fetch_cycle_delta(stale_frames):
+    """Fetch only the cycles added since the cached copies in ``stale_frames`` were taken.
+
+    ``stale_frames`` maps ``str(cell_id)`` to the cell's last cached frame. Rows from the last
+    cached cycle onwards are fetched with the delta query and replace the cached tail, so a
+    cycle that was still running when it was cached is updated too. Returns a dict keyed by
+    ``str(cell_id)`` like ``fetch_cycle_batch``.
+    """
+    since = {cell_id: frame["cycle_number"].max() for cell_id, frame in stale_frames.items()}
+    params = {"cell_cycles": ",".join(f"{cell_id}:{cycle_number}" for cell_id, cycle_number in since.items())}
+    try:
+        delta = inflight_requests.do(make_cache_key(CYCLE_DELTA_QUERY_ID, params), fetch_query_frame,
+                                     CYCLE_DELTA_QUERY_ID, params)
+    except RedashError as e:
+        print(f"Error fetching cycle delta from Redash: {e}")
+        return dict(stale_frames)
+
+    new_rows = {}
+    if not delta.is_empty() and "cell_id" in delta.columns:
+        for (cell_id,), frame in delta.partition_by("cell_id", as_dict=True).items():
+            new_rows[str(cell_id)] = frame
+
+    frames = {}
+    for cell_id, stale in stale_frames.items():
+        rows = new_rows.get(cell_id)
+        if rows is None:
+            frame = stale
+        else:
+            frame = pl.concat([stale.filter(pl.col("cycle_number") < since[cell_id]), rows],
+                              how="vertical_relaxed")
+        # The spliced frame is no Redash result; keep when it was last fetched in full and
+        # count the syncs, so plan_delta_cells knows when to fetch it in full again
+        sync_info = get_result_version(CYCLE_QUERY_ID, cycle_params(cell_id)) or {}
+        store_result(CYCLE_QUERY_ID, cycle_params(cell_id), frame,
+                     {"fetched_at": sync_info.get("fetched_at"),
+                      "delta_syncs": sync_info.get("delta_syncs", 0) + 1})
+        frames[cell_id] = frame
+
+    print(f"Delta sync fetched {len(delta)} rows for {len(stale_frames)} cells")
+    return frames
+
+
+def fetch_cell_cycle_frame(cell_id, options=None):
+    """Fetch cycle data for a single cell with its own query."""
+    return {str(cell_id): get_redash_query_results(cycle_query_id(options), cycle_params(cell_id, options))}
+
+
+def get_cycle_executor():
+    """Return the thread pool shared by the cycle loads of all sessions."""
+    global _cycle_executor
+    if _cycle_executor is None:
+        with _cycle_executor_lock:
+            if _cycle_executor is None:
+                _cycle_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS,
+                                                     thread_name_prefix="cycle-loader")
+    return _cycle_executor
+
+
+def fetch_cycle_frames(cell_ids, cell_metadata=None, batched=CYCLE_BATCHED_FETCH,
+                       max_workers=MAX_CONCURRENT_REQUESTS, options=None, progress=None, cancel_event=None,
+                       on_frames=None):
+    """Fetch per-cell cycle frames on the shared cycle query pool.
+
+    Cached cells are served directly. Expired cells that are still under test only fetch
+    their new cycles (see ``plan_delta_cells``) when ``CYCLE_DELTA_SYNC`` is on. The remaining
+    cells are fetched in batches (or one query per cell when ``batched`` is False) on the pool
+    shared by all loads (``get_cycle_executor``), which runs at most MAX_CONCURRENT_REQUESTS
+    queries at once; ``max_workers`` only sizes the batches, and 1 runs the queries one by
+    one on the calling thread. Each result lands in the cache as soon as its request completes. ``options``
+    (see ``cycle_query_options``) selects projected/sampled loads, which are cached
+    separately from full-resolution data. Returns a dict keyed by ``str(cell_id)``.
+
+    ``progress(done, total)`` is called with the number of cells loaded so far, first for the
+    cached cells and then as each query completes. Setting ``cancel_event`` stops the load:
+    queries not yet started are dropped and ``CycleLoadCancelled`` is raised. Queries already
+    running finish in the background and still fill the cache. ``on_frames(frames)`` receives
+    each group of newly loaded per-cell frames as it lands, for progressive display.
+    """
+    def report(frames):
+        if on_frames is not None and frames:
+            on_frames(frames)
+        if progress is not None:
+            progress(len(cell_frames), len(cell_ids))
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise CycleLoadCancelled(f"Cycle load for {len(cell_ids)} cells cancelled")
+
+    cell_frames = {}
+    missing = []
+    for cell_id in cell_ids:
+        cached = get_cached_cycle_frame(cell_id, options=options)
+        if cached is None:
+            missing.append(cell_id)
+        else:
+            cell_frames[str(cell_id)] = cached
+    report(dict(cell_frames))
+
+    if not missing:
+        return cell_frames
+
+    jobs = []
+    if CYCLE_DELTA_SYNC and not options:
+        delta_cells = plan_delta_cells(missing, cell_metadata)
+        missing = [cell_id for cell_id in missing if str(cell_id) not in delta_cells]
+        delta_ids = list(delta_cells)
+        for start in range(0, len(delta_ids), CYCLE_BATCH_SIZE):
+            jobs.append(partial(fetch_cycle_delta, {cell_id: delta_cells[cell_id]
+                                                    for cell_id in delta_ids[start:start + CYCLE_BATCH_SIZE]}))
+
+    if missing and batched:
+        # Spread the cells over enough batches to keep every worker busy
+        batch_size = max(1, min(CYCLE_BATCH_SIZE, -(-len(missing) // max(max_workers, 1))))
+        batches = plan_cycle_batches(missing, cell_metadata, batch_size=batch_size)
+        jobs.extend(partial(fetch_cycle_batch, batch, options) for batch in batches)
+    else:
+        jobs.extend(partial(fetch_cell_cycle_frame, cell_id, options) for cell_id in missing)
+    print(f"Fetching {len(missing)} cells and syncing {len(cell_ids) - len(cell_frames) - len(missing)} "
+          f"cells with {len(jobs)} queries")
+
+    if max_workers <= 1:
+        for job in jobs:
+            check_cancelled()
+            frames = job()
+            cell_frames.update(frames)
+            report(frames)
+        return cell_frames
+
+    executor = get_cycle_executor()
+    futures = [executor.submit(job) for job in jobs]
+    try:
+        for future in as_completed(futures):
+            check_cancelled()
+            frames = future.result()
+            cell_frames.update(frames)
+            report(frames)
+    finally:
+        # On cancellation or error, drop queued queries without waiting for running ones
+        for future in futures:
+            future.cancel()
+    return cell_frames
+
+
+def get_cycle_data(cell_ids=None, cell_metadata=None, batched=CYCLE_BATCHED_FETCH,
+                   max_workers=MAX_CONCURRENT_REQUESTS, normalize=True, overview=False, options=None,
+                   progress=None, cancel_event=None, on_frames=None):
+    """Get cycle data and join with cell metadata.
+
+    With ``batched=True`` cells missing from the cache are fetched several at a time through
+    the templated ``cell_ids`` parameter; otherwise one query is issued per cell. Up to
+    ``max_workers`` queries run concurrently. Cells still under test that have a cached copy
+    only fetch their new cycles; normalization runs on the combined frame afterwards, so the
+    references of those cells are recomputed along with everything else in the same pass.
+    Cells appear in the result in ``cell_ids`` order.
+    With ``normalize=True`` the per-cell ``_norm_reg``/``_norm_p95`` columns are added.
+
+    ``overview=True`` loads the projected, sampled overview configured by CYCLE_OVERVIEW_*
+    instead of every cycle; call again with ``overview=False`` to upgrade to full resolution.
+    ``options`` from ``cycle_query_options`` selects any other projection or sampling.
+    ``progress``, ``cancel_event`` and ``on_frames`` are passed to ``fetch_cycle_frames``.
+    """
     if not cell_ids:
         return pl.DataFrame()
-    # Create a progress widget
-    # progress = pn.widgets.Progress(value=0, max=len(cell_ids), name="Loading Cells")
-    # if status_indicator:
-    #     status_indicator.object = pn.Column(
-    #         "**Fetching cycle data from database...**",
-    #         progress
-    #     )
+
+    if overview and options is None:
+        options = overview_cycle_options()
+    with interactive_loads:
+        cell_frames = fetch_cycle_frames(cell_ids, cell_metadata, batched=batched, max_workers=max_workers,
+                                         options=options, progress=progress, cancel_event=cancel_event,
+                                         on_frames=on_frames)
+    if cancel_event is not None and cancel_event.is_set():
+        raise CycleLoadCancelled(f"Cycle load for {len(cell_ids)} cells cancelled")
 
     all_results = []
     for cell_id in cell_ids:
-        params = {"cell_ids": str(cell_id)}
-        cell_data = get_redash_query_results(CYCLE_QUERY_ID, params)
-        # Debugging step
-        # print(f"Fetched columns for cell_id {cell_id}: {cell_data.columns}")
-        # print(cell_data.head())
-
-        if not cell_data.is_empty():
-            # List of columns that should be normalized (containing capacity or energy)
-            normalize_columns = [col for col in cell_data.columns if
-                                 any(term in col.lower() for term in ['_capacity', '_energy'])]
-
-            # Create expressions for normalization
-            norm_expressions = []
-            for col in normalize_columns:
-                # 1. Regular cycle normalization (using cycle 1 as reference)
-                # first_cycle_val = cell_data.filter(pl.col('regular_cycle_number') == 1)[col].item()
-                first_cycle_val = (
-                    cell_data
-                    .filter(pl.col('regular_cycle_number') > 0)
-                    .sort('regular_cycle_number')
-                    .head(1)
-                    .select(col)
-                    .item()
-                )
-                norm_expressions.append(
-
-                    (pl.col(col) / first_cycle_val).alias(f'{col}_norm_reg')
-                )
-
-                # 2. 95th percentile normalization
-                p95_val = cell_data[col].quantile(0.95)
-                norm_expressions.append(
-                    (pl.col(col) / p95_val).alias(f'{col}_norm_p95')
-                )
-
-            # Apply normalizations for this cell
-            if norm_expressions:
-                cell_data = cell_data.with_columns(norm_expressions)
-
+        cell_data = cell_frames.get(str(cell_id))
+        if cell_data is not None and not cell_data.is_empty():
             all_results.append(cell_data)
     print('Number of cells loaded: ', len(all_results))
-    cycle_data = pl.concat(all_results) if all_results else pl.DataFrame()
+    if not all_results:
+        return pl.DataFrame()
+
+    cycle_data = pl.concat(all_results, how="vertical_relaxed")
+    if normalize:
+        cycle_data = normalize_cycle_data(cycle_data)
     return cycle_data
@@ -0,0 +1,128 @@
+# battery_dashboard/data/paging.py
+import numpy as np
+import polars as pl
+from ..config import TABLE_PAGE_SIZE
+from .catalog import CatalogView
+
+
+def header_filter_expr(filters, schema):
+    """Combine Tabulator header filters (``{"field", "type", "value"}`` dicts) into one predicate.
+
+    Returns None if no filter applies. Filters on unknown columns or with values that do
+    not fit the column are ignored, as the table does client-side.
+    """
+    conditions = []
+    for filt in filters or []:
+        column, op, value = filt.get("field"), filt.get("type"), filt.get("value")
+        if isinstance(value, list):
+            if not value:
+                continue
+            value = value[0] if len(value) == 1 and op != "in" else value
+        if column not in schema or value is None or value == "":
+            continue
+
+        dtype = schema[column]
+        text = pl.col(column).cast(pl.Utf8).str.to_lowercase()
+        if op in ("like", "keywords"):
+            words = str(value).lower().split() if op == "keywords" else [str(value).lower()]
+            conditions.extend(text.str.contains(word, literal=True) for word in words)
+        elif op == "starts":
+            conditions.append(text.str.starts_with(str(value).lower()))
+        elif op == "ends":
+            conditions.append(text.str.ends_with(str(value).lower()))
+        elif op == "in":
+            values = value if isinstance(value, list) else [value]
+            conditions.append(pl.col(column).cast(pl.Utf8).is_in([str(v) for v in values]))
+        elif op in ("=", "!=", "<", ">", "<=", ">="):
+            try:
+                value = float(value) if dtype.is_numeric() else str(value)
+            except (TypeError, ValueError):
+                continue
+            operand = pl.col(column) if dtype.is_numeric() else pl.col(column).cast(pl.Utf8)
+            conditions.append({"=": operand == value, "!=": operand != value,
+                               "<": operand < value, ">": operand > value,
+                               "<=": operand <= value, ">=": operand >= value}[op])
+    return pl.all_horizontal(conditions) if conditions else None
+
+
+class PagedTableSource:
+    """Serves a catalog view to the cell table one page at a time.
+
+    Header filters and sorting are applied to the row positions with Polars and numpy;
+    only the rows and columns of the requested page are gathered and converted for the
+    table. Single-column sorts reuse the snapshot's cached sort permutation, so sorting
+    costs one pass over the permutation instead of a sort.
+    """
+
+    def __init__(self, view, columns=None, page_size=TABLE_PAGE_SIZE):
+        self.page_size = max(page_size, 1)
+        self.columns = columns
+        self.sorters = []
+        self.filters = []
+        self.page = 0
+        self.set_view(view)
+
+    def set_view(self, view):
+        """Show a new view from the first page, keeping the header filters and sort."""
+        self.view = view
+        self.refresh()
+
+    def set_columns(self, columns):
+        self.columns = columns
+
+    def set_sorters(self, sorters):
+        self.sorters = list(sorters or [])
+        self.refresh()
+
+    def set_filters(self, filters):
+        self.filters = list(filters or [])
+        self.refresh()
+
+    def refresh(self):
+        """Recompute the ordered row positions and go back to the first page."""
+        predicate = header_filter_expr(self.filters, self.view.snapshot.data.schema)
+        self.filtered_view = self.view.filter(predicate) if predicate is not None else self.view
+        self.rows = self._ordered_rows(self.filtered_view)
+        self.page = 0
+
+    def _ordered_rows(self, view):
+        # Sorts on unknown or nested columns are ignored, as they cannot be ordered
+        sorters = [s for s in self.sorters if view.snapshot.is_sortable(s.get("field"))]
+        if not sorters or not len(view):
+            return view.positions()
+        fields = [s["field"] for s in sorters]
+        descending = [s.get("dir") == "desc" for s in sorters]
+
+        if len(fields) == 1:
+            order = view.snapshot.sort_order(fields[0], descending[0])
+            return order if view.rows is None else order[view.row_mask()[order]]
+
+        frame = view.frame(fields).with_columns(pl.col(pl.Categorical).cast(pl.Utf8),
+                                                pl.Series("__row", view.positions()))
+        return frame.sort(fields, descending=descending, nulls_last=True)["__row"].to_numpy()
+
+    @property
+    def total(self):
+        return len(self.rows)
+
+    @property
+    def page_count(self):
+        return max(-(-self.total // self.page_size), 1)
+
+    def set_page(self, page):
+        self.page = min(max(page, 0), self.page_count - 1)
+
+    def page_rows(self):
+        """Snapshot row positions of the current page, in display order."""
+        start = self.page * self.page_size
+        return self.rows[start:start + self.page_size]
+
+    def page_frame(self):
+        """The current page as a DataFrame with the display columns."""
+        return CatalogView(self.view.snapshot, self.page_rows()).frame(self.columns)
+
+    def ordered_view(self, rows=None):
+        """A view of ``rows`` (default: all rows shown) in display order."""
+        if rows is None:
+            return CatalogView(self.view.snapshot, self.rows)
+        return CatalogView(self.view.snapshot, self.rows[np.isin(self.rows, rows)])
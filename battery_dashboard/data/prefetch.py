@@ -0,0 +1,79 @@
+# battery_dashboard/data/prefetch.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..config import (CYCLE_PREFETCH_WORKERS, CYCLE_PREFETCH_BATCH_SIZE, CYCLE_PREFETCH_MAX_CELLS,
+                      CYCLE_OVERVIEW_MIN_CELLS)
+from .loaders import fetch_cycle_frames, interactive_loads, overview_cycle_options
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_prefetch_executor():
+    """Return the small thread pool shared by all sessions' prefetchers."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=CYCLE_PREFETCH_WORKERS,
+                                               thread_name_prefix="cycle-prefetch")
+    return _executor
+
+
+class CyclePrefetcher:
+    """Warm the cycle cache for cells while a user is still selecting them.
+
+    ``update`` is called with the current selection: newly checked cells are queued, and
+    cells that were unchecked before their turn are dropped from the queue. Cells are
+    fetched in small batches on the shared prefetch pool, one batch at a time per session,
+    and the prefetcher waits before each batch while any interactive cycle load is running.
+    Prefetched frames land in the same cache entries "Load Cycle Data" reads.
+    """
+
+    def __init__(self, batch_size=CYCLE_PREFETCH_BATCH_SIZE, max_cells=CYCLE_PREFETCH_MAX_CELLS):
+        self.batch_size = batch_size
+        self.max_cells = max_cells
+        self._lock = threading.Lock()
+        self._pending = []
+        self._wanted = set()
+        self._cell_metadata = None
+        self._options = None
+        self._future = None
+
+    def update(self, cell_ids, cell_metadata=None):
+        """Prefetch for the current selection ``cell_ids``, cancelling work for unchecked cells."""
+        cell_ids = list(cell_ids)[:self.max_cells]
+        wanted = {str(cell_id) for cell_id in cell_ids}
+        with self._lock:
+            new_cells = [cell_id for cell_id in cell_ids if str(cell_id) not in self._wanted]
+            self._pending = [cell_id for cell_id in self._pending if str(cell_id) in wanted] + new_cells
+            self._wanted = wanted
+            self._cell_metadata = cell_metadata
+            # Warm whatever resolution "Load Cycle Data" is going to ask for
+            self._options = overview_cycle_options() if len(cell_ids) >= CYCLE_OVERVIEW_MIN_CELLS else None
+            if self._pending and self._future is None:
+                self._future = get_prefetch_executor().submit(self._run)
+
+    def cancel(self):
+        """Drop all queued cells; a batch already in flight still completes into the cache."""
+        self.update([])
+
+    def _next_batch(self):
+        with self._lock:
+            batch = self._pending[:self.batch_size]
+            del self._pending[:self.batch_size]
+            if not batch:
+                self._future = None
+            return batch, self._cell_metadata, self._options
+
+    def _run(self):
+        while True:
+            # Interactive loads go first
+            interactive_loads.wait_idle()
+            batch, cell_metadata, options = self._next_batch()
+            if not batch:
+                return
+            try:
+                fetch_cycle_frames(batch, cell_metadata, max_workers=1, options=options)
+            except Exception as e:
+                print(f"Cycle prefetch failed for {len(batch)} cells: {e}")
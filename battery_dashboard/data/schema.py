@@ -0,0 +1,121 @@
+# battery_dashboard/data/schema.py
+import polars as pl
+from ..config import (CELL_QUERY_ID, CELL_DELTA_QUERY_ID, CATALOG_QUERY_ID,
+                      CYCLE_QUERY_ID, CYCLE_DELTA_QUERY_ID, CYCLE_OPTIONS_QUERY_ID)
+
+# Polars dtypes for the column types Redash reports
+REDASH_TYPE_MAP = {
+    "integer": pl.Int64,
+    "float": pl.Float64,
+    "boolean": pl.Boolean,
+    "string": pl.String,
+    "datetime": pl.Datetime,
+    "date": pl.Date,
+}
+
+# Low-cardinality text columns stored as Categorical
+CATEGORICAL_COLUMNS = {"cycle_type", "experiment_group", "design_name"}
+
+CELL_SCHEMA_OVERRIDES = {
+    "cell_type": pl.Categorical,
+    "layer_types": pl.Categorical,
+    "test_status": pl.Categorical,
+    "retention_category": pl.Categorical,
+    "cycle_life_category": pl.Categorical,
+}
+
+CYCLE_SCHEMA_OVERRIDES = {
+    "cycle_start_index": pl.Int32,
+    "cycle_end_index": pl.Int32,
+    "original_start_row": pl.Int32,
+    "original_end_row": pl.Int32,
+}
+
+# Per-query dtype overrides, applied after the name-based rules
+QUERY_SCHEMA_OVERRIDES = {
+    # The delta queries return the same columns, so merged rows keep the cached dtypes
+    str(CELL_QUERY_ID): CELL_SCHEMA_OVERRIDES,
+    str(CELL_DELTA_QUERY_ID): CELL_SCHEMA_OVERRIDES,
+    str(CATALOG_QUERY_ID): CELL_SCHEMA_OVERRIDES,
+    str(CYCLE_QUERY_ID): CYCLE_SCHEMA_OVERRIDES,
+    str(CYCLE_DELTA_QUERY_ID): CYCLE_SCHEMA_OVERRIDES,
+    str(CYCLE_OPTIONS_QUERY_ID): CYCLE_SCHEMA_OVERRIDES,
+}
+
+
+def compact_dtype(name, redash_type):
+    """Pick a compact Polars dtype for a column from its name and Redash type."""
+    dtype = REDASH_TYPE_MAP.get(redash_type, pl.String)
+    lower = name.lower()
+
+    if lower in CATEGORICAL_COLUMNS:
+        return pl.Categorical
+    if dtype == pl.Float64 and ("capacity" in lower or "energy" in lower):
+        return pl.Float32
+    if dtype == pl.Int64 and ("cycle_number" in lower or lower.endswith("_cycles")):
+        return pl.Int32
+    return dtype
+
+
+def build_schema(columns, query_id=None):
+    """Build an ordered ``{name: dtype}`` schema from a Redash ``columns`` array."""
+    overrides = QUERY_SCHEMA_OVERRIDES.get(str(query_id), {})
+    schema = {}
+    for column in columns:
+        name = column["name"]
+        schema[name] = overrides.get(name, compact_dtype(name, column.get("type")))
+    return schema
+
+
+def _to_series(name, values, dtype):
+    if dtype == pl.Datetime:
+        return pl.Series(name, values, dtype=pl.String, strict=False).str.to_datetime(strict=False)
+    if dtype == pl.Date:
+        return pl.Series(name, values, dtype=pl.String, strict=False).str.to_date(strict=False)
+    if dtype == pl.Categorical:
+        return pl.Series(name, values, dtype=pl.String, strict=False).cast(pl.Categorical)
+    return pl.Series(name, values, dtype=dtype, strict=False)
+
+
+def frame_from_columns(column_values, columns, query_id=None):
+    """Build a typed DataFrame from ``{name: [values]}`` and a Redash ``columns`` array."""
+    if not columns:
+        return pl.DataFrame(column_values)
+
+    schema = build_schema(columns, query_id)
+    row_count = max((len(values) for values in column_values.values()), default=0)
+    return pl.DataFrame([
+        _to_series(name, column_values.get(name) or [None] * row_count, dtype)
+        for name, dtype in schema.items()
+    ])
+
+
+def frame_from_redash(data, query_id=None):
+    """Build a typed DataFrame from the ``data`` object of a Redash query result.
+
+    Values are gathered column by column and converted with the dtypes from
+    ``build_schema``, so Polars does not have to infer a schema row by row.
+    """
+    rows = data.get("rows") or []
+    columns = data.get("columns")
+    if not columns:
+        return pl.DataFrame(rows)
+
+    column_values = {column["name"]: [row.get(column["name"]) for row in rows] for column in columns}
+    return frame_from_columns(column_values, columns, query_id)
+
+
+def compact_frame(df, query_id=None):
+    """Apply the compact dtype rules to a frame whose types were inferred (e.g. from CSV)."""
+    inferred_types = {pl.Int64: "integer", pl.Float64: "float", pl.Boolean: "boolean", pl.String: "string"}
+    overrides = QUERY_SCHEMA_OVERRIDES.get(str(query_id), {})
+
+    casts = []
+    for name, dtype in df.schema.items():
+        redash_type = inferred_types.get(dtype)
+        if redash_type is None:
+            continue
+        target = overrides.get(name, compact_dtype(name, redash_type))
+        if target != dtype:
+            casts.append(pl.col(name).cast(target, strict=False))
+    return df.with_columns(casts) if casts else df
@@ -0,0 +1,326 @@
+# battery_dashboard/data/search.py
+# Search queries for the cell catalog, compiled into a single Polars expression.
+#
+#   term            free text, matched case-insensitively against every column (through
+#                   the snapshot's prebuilt search blob)
+#   "two words"     quoted free text
+#   col:value       column contains value (case-insensitive); equality for numeric columns
+#   col:>=value     comparisons: > >= < <= = !=
+#   col:100..500    inclusive range; either end may be left open (100.. or ..500)
+#   col:a,b,c       IN list, also written col:(a, b, c)
+#   a AND b, a b    both terms must match
+#   a OR b          either term matches
+#   NOT a           term must not match
+#   ( ... )         grouping
+#
+# Column names are matched case-insensitively and may be given by the aliases below.
+import re
+from functools import lru_cache
+import polars as pl
+from ..config import SEARCH_CACHE_SIZE
+from .indexes import SEARCH_COLUMN
+
+# Short names accepted for common catalog columns
+FIELD_ALIASES = {
+    "id": "cell_id",
+    "name": "cell_name",
+    "cycles": "regular_cycles",
+    "capacity": "actual_nominal_capacity_ah",
+    "retention": "discharge_capacity_retention",
+    "design": "design_name",
+    "group": "experiment_group",
+    "status": "test_status",
+    "year": "test_year",
+}
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<quoted>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>>=|<=|!=|[<>=])
+      | (?P<punct>[():,])
+      | (?P<word>(?:[^\s():,"'<>=!]|!(?!=))+)
+    )""", re.VERBOSE)
+
+
+class SearchSyntaxError(ValueError):
+    """Raised when a search query cannot be parsed or refers to an unknown column."""
+
+
+def tokenize(query):
+    """Split a query into ``(kind, text)`` tokens; kind is quoted, op, punct or word."""
+    tokens = []
+    position = 0
+    query = query.rstrip()
+    while position < len(query):
+        match = TOKEN_PATTERN.match(query, position)
+        if match is None or match.end() == position:
+            raise SearchSyntaxError(f"Unexpected character '{query[position:].strip()[0]}'")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "quoted":
+            text = re.sub(r"\\(.)", r"\1", text[1:-1])
+        tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+
+def resolve_column(name, schema):
+    """Return the catalog column a search field refers to."""
+    lower = name.lower()
+    lower = FIELD_ALIASES.get(lower, lower)
+    for column in schema:
+        if column.lower() == lower:
+            return column
+    raise SearchSyntaxError(f"Column '{name}' not found")
+
+
+def free_text_expr(text):
+    """Rows where any column contains ``text``, ignoring case.
+
+    The predicate reads ``SEARCH_COLUMN``, which ``CatalogView.filter`` resolves to the
+    snapshot's lowercase search blob.
+    """
+    return pl.col(SEARCH_COLUMN).str.contains(text.lower(), literal=True)
+
+
+class _Parser:
+    """Recursive descent parser turning query tokens into a Polars expression."""
+
+    def __init__(self, tokens, schema):
+        self.tokens = tokens
+        self.position = 0
+        self.schema = schema
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def advance(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def at_keyword(self, keyword):
+        return self.peek() == ("word", keyword)
+
+    def expect(self, token, message):
+        if self.peek() != token:
+            raise SearchSyntaxError(message)
+        self.advance()
+
+    def parse(self):
+        expr = self.parse_or()
+        if self.peek()[0] is not None:
+            raise SearchSyntaxError(f"Unexpected '{self.peek()[1]}'")
+        return expr
+
+    def parse_or(self):
+        expr = self.parse_and()
+        while self.at_keyword("OR"):
+            self.advance()
+            expr = expr | self.parse_and()
+        return expr
+
+    def parse_and(self):
+        expr = self.parse_not()
+        while True:
+            if self.at_keyword("AND"):
+                self.advance()
+            elif self.peek()[0] is None or self.peek() == ("punct", ")") or self.at_keyword("OR"):
+                return expr
+            expr = expr & self.parse_not()
+
+    def parse_not(self):
+        if self.at_keyword("NOT"):
+            self.advance()
+            return ~self.parse_not()
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, text = self.advance()
+        if (kind, text) == ("punct", "("):
+            expr = self.parse_or()
+            self.expect(("punct", ")"), "Missing ')'")
+            return expr
+        if kind == "word" and self.peek() == ("punct", ":"):
+            self.advance()
+            return self.parse_field(resolve_column(text, self.schema))
+        if kind in ("word", "quoted"):
+            return free_text_expr(text)
+        raise SearchSyntaxError("Incomplete search query" if kind is None else f"Unexpected '{text}'")
+
+    def parse_value(self):
+        kind, text = self.advance()
+        if kind not in ("word", "quoted"):
+            raise SearchSyntaxError("Missing value after ':'" if kind is None else f"Unexpected '{text}'")
+        return kind, text
+
+    def parse_field(self, column):
+        dtype = self.schema[column]
+        if self.peek()[0] == "op":
+            op = self.advance()[1]
+            return compare(column, dtype, op, self.parse_value()[1])
+
+        if self.peek() == ("punct", "("):
+            self.advance()
+            values = [self.parse_value()[1]]
+            while self.peek() == ("punct", ","):
+                self.advance()
+                values.append(self.parse_value()[1])
+            self.expect(("punct", ")"), "Missing ')' after value list")
+            return is_in(column, dtype, values)
+
+        kind, text = self.parse_value()
+        if self.peek() == ("punct", ","):
+            values = [text]
+            while self.peek() == ("punct", ","):
+                self.advance()
+                values.append(self.parse_value()[1])
+            return is_in(column, dtype, values)
+        if kind == "word" and ".." in text:
+            low, high = text.split("..", 1)
+            return between(column, dtype, low, high)
+        return matches(column, dtype, text)
+
+
+def _literal(column, dtype, value):
+    """Convert a query value for comparison with ``column``."""
+    if dtype.is_numeric():
+        try:
+            number = float(value)
+        except ValueError:
+            raise SearchSyntaxError(f"Invalid numeric value '{value}' for {column}") from None
+        if dtype.is_integer():
+            if not number.is_integer():
+                raise SearchSyntaxError(f"Invalid integer value '{value}' for {column}")
+            return int(number)
+        return number
+    return value
+
+
+def _operand(column, dtype):
+    # Non-numeric columns are compared as text; ISO dates compare correctly as strings
+    return pl.col(column) if dtype.is_numeric() else pl.col(column).cast(pl.Utf8)
+
+
+def compare(column, dtype, op, value):
+    operand = _operand(column, dtype)
+    value = _literal(column, dtype, value)
+    if op in ("=", "!=") and not dtype.is_numeric():
+        # Text equality ignores case, like the other text matches
+        operand = operand.str.to_lowercase()
+        value = value.lower()
+    if op == ">":
+        return operand > value
+    if op == ">=":
+        return operand >= value
+    if op == "<":
+        return operand < value
+    if op == "<=":
+        return operand <= value
+    if op == "!=":
+        return operand != value
+    return operand == value
+
+
+def between(column, dtype, low, high):
+    operand = _operand(column, dtype)
+    conditions = []
+    if low:
+        conditions.append(operand >= _literal(column, dtype, low))
+    if high:
+        conditions.append(operand <= _literal(column, dtype, high))
+    if not conditions:
+        raise SearchSyntaxError(f"Empty range for {column}")
+    return pl.all_horizontal(conditions)
+
+
+def is_in(column, dtype, values):
+    if dtype.is_numeric():
+        # Polars does not compare an integer column with a list of floats
+        literals = [_literal(column, dtype, value) for value in values]
+        return pl.col(column).is_in(pl.lit(pl.Series(literals, dtype=dtype)).implode())
+    return pl.col(column).cast(pl.Utf8).str.to_lowercase().is_in([value.lower() for value in values])
+
+
+def matches(column, dtype, value):
+    if dtype.is_numeric():
+        return pl.col(column) == _literal(column, dtype, value)
+    return pl.col(column).cast(pl.Utf8).str.to_lowercase().str.contains(value.lower(), literal=True)
+
+
+def _conjunction_terms(tokens):
+    """Split the tokens of a plain conjunction into terms; None if the query has OR, NOT or groups.
+
+    Free-text terms are ``("text", value)``, field terms the tuple of their tokens.
+    """
+    terms = []
+    position = 0
+    while position < len(tokens):
+        kind, text = tokens[position]
+        if kind == "word" and text in ("OR", "NOT"):
+            return None
+        if kind == "word" and text == "AND":
+            position += 1
+            continue
+        if kind not in ("word", "quoted"):
+            return None
+        if position + 1 < len(tokens) and tokens[position + 1] == ("punct", ":"):
+            # field ':' [op] value (',' value)*
+            end = position + 2
+            if end < len(tokens) and tokens[end][0] == "op":
+                end += 1
+            end += 1
+            while end + 1 < len(tokens) and tokens[end] == ("punct", ","):
+                end += 2
+            term = tuple(tokens[position:end])
+            if any(kind == "punct" and text not in (":", ",") for kind, text in term):
+                return None
+            terms.append(term)
+            position = end
+        else:
+            terms.append(("text", text))
+            position += 1
+    return terms
+
+
+def narrows(previous, query):
+    """True if every row matching ``query`` also matches ``previous``.
+
+    Holds when both are plain conjunctions and ``query`` keeps the terms of ``previous``,
+    possibly extending its last free-text term (``alp`` -> ``alpha``), and adds more terms.
+    The result of ``previous`` can then be filtered instead of the whole catalog. Anything
+    else (OR, NOT, groups, edited comparisons) is answered with False.
+    """
+    try:
+        previous_terms = _conjunction_terms(tokenize(previous))
+        terms = _conjunction_terms(tokenize(query))
+    except SearchSyntaxError:
+        return False
+    if not previous_terms or terms is None or len(terms) < len(previous_terms):
+        return False
+    *kept, last = previous_terms
+    if terms[:len(kept)] != kept:
+        return False
+    extended = terms[len(kept)]
+    if extended == last:
+        return True
+    return extended[0] == last[0] == "text" and last[1].lower() in extended[1].lower()
+
+
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def _compile(query, schema_items):
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    return _Parser(tokens, dict(schema_items)).parse()
+
+
+def compile_search(query, schema):
+    """Compile a search query for a frame with ``schema`` into one Polars predicate.
+
+    Returns None for an empty query and raises ``SearchSyntaxError`` for an invalid one.
+    Compiled predicates are kept in an LRU keyed on the query text and schema, so a query
+    that is typed again is not parsed again.
+    """
+    return _compile(query.strip(), tuple(schema.items()))
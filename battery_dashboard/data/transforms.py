@@ -0,0 +1,49 @@
+# battery_dashboard/data/transforms.py
+import polars as pl
+
+# Columns containing these terms are normalized
+NORMALIZE_TERMS = ['_capacity', '_energy']
+NORMALIZED_SUFFIXES = ('_norm_reg', '_norm_p95')
+
+
+def get_normalize_columns(df):
+    """Return the capacity and energy columns of a cycle frame that should be normalized."""
+    return [col for col in df.columns
+            if any(term in col.lower() for term in NORMALIZE_TERMS)
+            and not col.endswith(NORMALIZED_SUFFIXES)
+            and df.schema[col].is_numeric()]
+
+
+def normalize_cycle_data(df, columns=None, group_by="cell_id", reference_column="regular_cycle_number"):
+    """Add per-cell normalized copies of capacity and energy columns in one Polars pass.
+
+    For each column two columns are added, computed with window expressions over ``group_by``:
+
+    - ``<col>_norm_reg``: divided by the value at the cell's first positive regular cycle
+    - ``<col>_norm_p95``: divided by the cell's 95th percentile
+    """
+    if df.is_empty() or group_by not in df.columns:
+        return df
+
+    columns = get_normalize_columns(df) if columns is None else columns
+    has_reference = reference_column in df.columns
+
+    norm_expressions = []
+    for col in columns:
+        # 1. Regular cycle normalization (first positive regular cycle as reference)
+        if has_reference:
+            is_regular = pl.col(reference_column) > 0
+            first_regular_val = (
+                pl.col(col)
+                .filter(is_regular)
+                .sort_by(pl.col(reference_column).filter(is_regular))
+                .first()
+                .over(group_by)
+            )
+            norm_expressions.append((pl.col(col) / first_regular_val).alias(f'{col}_norm_reg'))
+
+        # 2. 95th percentile normalization
+        p95_val = pl.col(col).quantile(0.95).over(group_by)
+        norm_expressions.append((pl.col(col) / p95_val).alias(f'{col}_norm_p95'))
+
+    return df.with_columns(norm_expressions) if norm_expressions else df
@@ -0,0 +1,225 @@
+# battery_dashboard/data/transports.py
+# Ways of pulling a query result from Redash into a DataFrame:
+#   json   - POST the results endpoint and decode the whole JSON body (default)
+#   stream - parse the JSON body incrementally straight into column lists
+#   csv    - look up the query_result id, then download the CSV export and parse it with Polars
+#
+# Every fetcher returns ``(frame, info)`` where ``info`` holds the ``id`` and ``retrieved_at``
+# of the Redash query result. When the result id equals ``known_result_id`` the result is
+# unchanged since it was last loaded and ``frame`` is None: the rows are neither downloaded
+# nor parsed again. The json transport peeks at the id with the streaming parser when it
+# has a known id to compare with, so it needs ijson for this too.
+import io
+import polars as pl
+import urllib3
+from ..api.redash import RedashError, response_json
+from ..config import REDASH_TRANSPORT, QUERY_TRANSPORTS, REDASH_MAX_AGE, QUERY_MAX_AGES
+from .schema import frame_from_columns, frame_from_redash, compact_frame
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+TRANSPORTS = ("json", "stream", "csv")
+
+ROW_PREFIX = "query_result.data.rows.item"
+COLUMN_PREFIX = "query_result.data.columns.item"
+
+# Errors raised while reading or decoding a result body: non-JSON or truncated bodies and
+# connections that drop or time out mid-stream. They are re-raised as RedashError, so
+# callers fall back to cached results as for any other Redash failure.
+BODY_ERRORS = (ValueError, OSError, urllib3.exceptions.HTTPError) + \
+    ((ijson.JSONError,) if ijson is not None else ())
+
+_warned_missing_ijson = False
+
+
+def get_query_transport(query_id):
+    """Return the transport configured for a query (QUERY_TRANSPORTS, else REDASH_TRANSPORT)."""
+    transport = QUERY_TRANSPORTS.get(str(query_id), REDASH_TRANSPORT)
+    if transport not in TRANSPORTS:
+        print(f"Unknown Redash transport '{transport}' for query {query_id}, using json")
+        return "json"
+    if transport != "json" and ijson is None:
+        global _warned_missing_ijson
+        if not _warned_missing_ijson:
+            print("ijson is not installed, falling back to the json transport")
+            _warned_missing_ijson = True
+        return "json"
+    return transport
+
+
+def get_query_max_age(query_id):
+    """Return the Redash-side max_age for a query (QUERY_MAX_AGES, else REDASH_MAX_AGE)."""
+    return QUERY_MAX_AGES.get(str(query_id), REDASH_MAX_AGE)
+
+
+def fetch_json_frame(client, query_id, params=None, max_age=None, known_result_id=None):
+    """Fetch a result through the JSON endpoint, decoding the full response.
+
+    With a ``known_result_id`` (and ijson installed) the result id is peeked at first, and
+    the result is only downloaded by id if it changed.
+    """
+    if known_result_id is not None and ijson is not None:
+        info = peek_query_result(client, query_id, params, max_age)
+        if info["id"] == known_result_id:
+            return None, info
+        payload = response_json(client.get_query_result(info["id"]))
+    else:
+        payload = client.post_query_results(query_id, params, max_age)
+    if "job" in payload:
+        result_id = client.wait_for_job(payload["job"])
+        if result_id == known_result_id:
+            return None, {"id": result_id}
+        payload = response_json(client.get_query_result(result_id))
+
+    query_result = payload.get("query_result")
+    if not query_result or "data" not in query_result:
+        raise RedashError(f"Query {query_id} returned no query_result")
+
+    info = {"id": query_result.get("id"), "retrieved_at": query_result.get("retrieved_at")}
+    if info["id"] is not None and info["id"] == known_result_id:
+        return None, info
+    return frame_from_redash(query_result["data"], query_id), info
+
+
+def _build_value(events, first_event, first_value):
+    """Rebuild a nested JSON value (object or array) from the remaining parser events."""
+    builder = ijson.ObjectBuilder()
+    builder.event(first_event, first_value)
+    depth = 1
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                return builder.value
+
+
+def parse_result_stream(stream, stop_on_id=None, rows=True):
+    """Incrementally parse a Redash results payload.
+
+    Rows are appended straight into per-column lists, so the row dicts of the full
+    response are never materialized. Returns ``(info, columns, column_values)`` where
+    ``info`` holds ``id``/``retrieved_at`` of the query result, or ``job`` if Redash
+    answered with a job instead. Parsing ends early if ``stop_on_id(result_id)`` is true.
+    Redash writes the result id before the data, so usually no rows are read then; a
+    payload with the data first is read up to the id, keeping the rows it already parsed.
+    With ``rows=False`` rows and columns are skipped rather than collected, so finding an
+    id that follows the data costs reading the body but not holding it.
+    """
+    info = {}
+    columns = []
+    column_values = {}
+    row_count = 0
+    row = None
+    key = None
+
+    events = ijson.parse(stream, use_float=True)
+    for prefix, event, value in events:
+        if not rows and prefix.startswith("query_result.data"):
+            continue
+        if prefix == ROW_PREFIX:
+            if event == "start_map":
+                row = {}
+            elif event == "map_key":
+                key = value
+            elif event == "end_map":
+                for name in row:
+                    if name not in column_values:
+                        column_values[name] = [None] * row_count
+                for name, values in column_values.items():
+                    values.append(row.get(name))
+                row_count += 1
+                row = None
+        elif row is not None and prefix == f"{ROW_PREFIX}.{key}":
+            if event in ("start_map", "start_array"):
+                row[key] = _build_value(events, event, value)
+            else:
+                row[key] = value
+        elif prefix == COLUMN_PREFIX and event == "start_map":
+            columns.append(_build_value(events, event, value))
+        elif prefix in ("query_result.id", "query_result.retrieved_at"):
+            info[prefix.split(".")[-1]] = value
+            if prefix == "query_result.id" and stop_on_id is not None and stop_on_id(value):
+                break
+        elif prefix == "job" and event == "start_map":
+            info["job"] = _build_value(events, event, value)
+            break
+
+    return info, columns, column_values
+
+
+def _parse_response(response, stop_on_id=None, rows=True):
+    try:
+        response.raw.decode_content = True
+        return parse_result_stream(response.raw, stop_on_id, rows)
+    except BODY_ERRORS as e:
+        raise RedashError(f"Could not read Redash response from {response.url}: {e}") from e
+    finally:
+        # Closing drops the connection instead of reading the rest of the body
+        response.close()
+
+
+def fetch_stream_frame(client, query_id, params=None, max_age=None, known_result_id=None):
+    """Fetch a result through the JSON endpoint, parsing the body as it streams in."""
+    def is_known(result_id):
+        return result_id is not None and result_id == known_result_id
+
+    info, columns, column_values = _parse_response(
+        client.execute_query(query_id, params, max_age, stream=True), is_known)
+
+    if "job" in info:
+        result_id = client.wait_for_job(info["job"])
+        if is_known(result_id):
+            return None, {"id": result_id}
+        info, columns, column_values = _parse_response(client.get_query_result(result_id, stream=True))
+
+    if "id" not in info:
+        raise RedashError(f"Query {query_id} returned no query_result")
+    if is_known(info["id"]):
+        return None, info
+    return frame_from_columns(column_values, columns, query_id), info
+
+
+def peek_query_result(client, query_id, params=None, max_age=None):
+    """Return ``info`` for a query's current result without keeping its rows.
+
+    The body is read up to the result id: just its head when Redash writes the id before
+    the data, the whole body, with the rows skipped, otherwise.
+    """
+    info, _, _ = _parse_response(client.execute_query(query_id, params, max_age, stream=True),
+                                 stop_on_id=lambda result_id: True, rows=False)
+    if "job" in info:
+        return {"id": client.wait_for_job(info["job"])}
+    if "id" not in info:
+        raise RedashError(f"Query {query_id} returned no query_result")
+    return info
+
+
+def fetch_csv_frame(client, query_id, params=None, max_age=None, known_result_id=None):
+    """Fetch a result through Redash's CSV export and parse it with ``pl.read_csv``."""
+    info = peek_query_result(client, query_id, params, max_age)
+    if info["id"] == known_result_id:
+        return None, info
+
+    response = client.get_query_result(info["id"], filetype="csv")
+    if "html" in response.headers.get("Content-Type", ""):
+        raise RedashError(f"Query {query_id} result {info['id']} returned HTML instead of CSV")
+    if not response.content.strip():
+        return pl.DataFrame(), info
+    try:
+        df = pl.read_csv(io.BytesIO(response.content), try_parse_dates=True, infer_schema_length=10000)
+    except (pl.exceptions.PolarsError, ValueError) as e:
+        raise RedashError(f"Could not parse the CSV of query {query_id} result {info['id']}: {e}") from e
+    return compact_frame(df, query_id), info
+
+
+FETCHERS = {
+    "json": fetch_json_frame,
+    "stream": fetch_stream_frame,
+    "csv": fetch_csv_frame,
+}
@@ -1,36 +1,45 @@
 # battery_dashboard/main.py
 
-import panel as pn
-import param
-import holoviews as hv
+import threading
+from battery_dashboard.utils.profiling import startup_profiler
 
-# Load modules
-from battery_dashboard.components.cell_selector import CellSelectorTab
-from battery_dashboard.components.cycle_plots import CyclePlotsTab
-from battery_dashboard.data.loaders import load_initial_data
-from battery_dashboard.extensions import create_extensions
-from battery_dashboard.config import DEBUG, ENVIRONMENT
+# Load modules. The plotting stack (holoviews, hvplot, bokeh models) is only imported
+# with the cycle plots tab, the first time a session needs it.
+with startup_profiler.phase("imports"), startup_profiler.track_imports():
+    import panel as pn
+    import param
+    from battery_dashboard.components.cell_selector import CellSelectorTab
+    from battery_dashboard.data.catalog import warm_cell_catalog
+    from battery_dashboard.extensions import create_extensions
+    from battery_dashboard.config import DEBUG, ENVIRONMENT
 
 # Panel extensions
-pn.extension("plotly", "tabulator", "modal", sizing_mode="stretch_width")
-create_extensions()
+with startup_profiler.phase("panel extensions"):
+    pn.extension("plotly", "tabulator", "modal", sizing_mode="stretch_width")
+    create_extensions()
 
 print(f"Panel extensions loaded for {ENVIRONMENT} environment")
 
 
+# Position of the cycle analysis tab in create_modern_tabs
+CYCLE_PLOTS_TAB_INDEX = 1
+
+
 class BatteryDashboard(param.Parameterized):
     theme = param.Selector(default="default", objects=["default", "dark"])
 
-    def __init__(self, **params):
+    def __init__(self, catalog=None, **params):
         super().__init__(**params)
 
-        print("Loading initial cell data...")
-        self.cell_data = load_initial_data()
-        print(f"Loaded {len(self.cell_data)} cells")
+        # The catalog is shared by all sessions; the tabs are built once it has loaded
+        self.catalog = catalog if catalog is not None else warm_cell_catalog()
+        self.cell_data = None
+        self.cell_selector_tab = None
+        self.cycle_plots_tab = None
 
-        # Initialize tabs
-        self.cell_selector_tab = CellSelectorTab(self.cell_data)
-        self.cycle_plots_tab = CyclePlotsTab()
+        # Main area shows a loading shell until the tabs are built
+        self.main_area = pn.Column(self.create_loading_shell(), sizing_mode="stretch_both")
+        self.status_badge = pn.pane.HTML(self.status_badge_html("⏳ Loading cell catalog..."))
 
         # Create the theme toggle
         self.theme_toggle = pn.widgets.Toggle(
@@ -41,8 +50,96 @@ class BatteryDashboard(param.Parameterized):
         )
         self.theme_toggle.param.watch(self.toggle_theme, "value")
 
-        # Link tab interactions
-        self.cell_selector_tab.param.watch(self.on_selection_change, ["selected_cell_ids", "selected_data"])
+    def build_tabs(self):
+        """Create the tabs from the loaded catalog and swap them in for the loading shell."""
+        self.cell_data = self.catalog.data
+        print(f"Building dashboard with {len(self.cell_data)} cells")
+
+        with startup_profiler.phase("build cell selector tab"):
+            # Initialize tabs; the cycle plots tab is built on first use
+            self.cell_selector_tab = CellSelectorTab(self.cell_data, catalog=self.catalog)
+
+            # Link tab interactions
+            self.cell_selector_tab.param.watch(self.on_selection_change, ["selected_cell_ids", "selected_data"])
+
+            self.status_badge.object = self.status_badge_html(f"✅ Status: {len(self.cell_data)} cells loaded")
+            self.main_area.objects = [self.create_modern_tabs(), self.create_modern_footer()]
+        startup_profiler.report()
+
+    def get_cycle_plots_tab(self):
+        """Return the cycle plots tab, importing the plotting stack and building it on first use."""
+        if self.cycle_plots_tab is None:
+            with startup_profiler.phase("build cycle plots tab"):
+                from battery_dashboard.components.cycle_plots import CyclePlotsTab
+                self.cycle_plots_tab = CyclePlotsTab()
+                self.cycle_plots_page.objects = [self.cycle_plots_tab.create_layout()]
+        return self.cycle_plots_tab
+
+    def on_tab_change(self, event):
+        if event.new == CYCLE_PLOTS_TAB_INDEX:
+            self.get_cycle_plots_tab()
+
+    def build_tabs_when_ready(self):
+        """Build the tabs now if the catalog is loaded, otherwise as soon as it is.
+
+        In a served session the wait happens on a background thread and the tabs are built
+        on the session's document, so the shell renders immediately.
+        """
+        if self.catalog.ready.is_set():
+            self.build_tabs_or_show_error()
+            return
+
+        doc = pn.state.curdoc
+        if doc is None or doc.session_context is None:
+            self.catalog.ready.wait()
+            self.build_tabs_or_show_error()
+            return
+
+        def wait_for_catalog():
+            self.catalog.ready.wait()
+            doc.add_next_tick_callback(self.build_tabs_or_show_error)
+
+        threading.Thread(target=wait_for_catalog, name="dashboard-shell", daemon=True).start()
+
+    def build_tabs_or_show_error(self):
+        """Build the tabs, replacing the loading shell with the error page if that fails.
+
+        The build may run from a document callback, where an exception would otherwise leave
+        the session on the loading shell (e.g. when the catalog failed to load).
+        """
+        try:
+            self.build_tabs()
+        except Exception as e:
+            print(f"❌ Error building dashboard: {e}")
+            import traceback
+            traceback.print_exc()
+            self.status_badge.object = self.status_badge_html("❌ Failed to load")
+            self.main_area.objects = [create_error_page(e)]
+
+    def create_loading_shell(self):
+        """Placeholder shown while the shared cell catalog is loading."""
+        return pn.Column(
+            pn.indicators.LoadingSpinner(value=True, size=50, align="center"),
+            pn.pane.HTML("""
+                <div style="text-align: center; padding: 20px; color: var(--text-secondary);">
+                    <h2 style="color: var(--text-primary); margin-bottom: 10px;">Loading cell catalog...</h2>
+                    <p>The dashboard will appear as soon as the cell data is available.</p>
+                </div>
+            """),
+            align="center",
+            sizing_mode="stretch_width",
+            margin=(60, 0, 0, 0)
+        )
+
+    @staticmethod
+    def status_badge_html(text):
+        return f"""
+            <div style="background: rgba(255, 255, 255, 0.2); color: white; padding: 6px 12px; 
+                        border-radius: 6px; font-size: 0.875rem; font-weight: 500;
+                        backdrop-filter: blur(10px); display: flex; align-items: center; gap: 6px;">
+                {text}
+            </div>
+        """
 
     def toggle_theme(self, event):
         """Toggle between light and dark themes"""
@@ -61,31 +158,22 @@ class BatteryDashboard(param.Parameterized):
                 100, count=1
             )
 
-    def on_selection_change(self, event):
+    def on_selection_change(self, *events):
         """Handle selection changes from cell selector tab"""
         # Only update if both selected_cell_ids and selected_data are available
         if (hasattr(self.cell_selector_tab, "selected_cell_ids") and
                 hasattr(self.cell_selector_tab, "selected_data")):
             if self.cell_selector_tab.selected_data is not None:
                 print(f"Selection changed: {len(self.cell_selector_tab.selected_cell_ids)} cells selected")
-                self.cycle_plots_tab.update_selection(
+                self.get_cycle_plots_tab().update_selection(
                     self.cell_selector_tab.selected_cell_ids,
                     self.cell_selector_tab.selected_data
                 )
 
     def create_modern_header(self):
         """Create modern dashboard header matching the screenshot"""
-        # Get cell count dynamically
-        cell_count = len(self.cell_data) if hasattr(self, 'cell_data') else 0
-
-        # Status indicator with dynamic cell count
-        status_badge = pn.pane.HTML(f"""
-            <div style="background: rgba(255, 255, 255, 0.2); color: white; padding: 6px 12px; 
-                        border-radius: 6px; font-size: 0.875rem; font-weight: 500;
-                        backdrop-filter: blur(10px); display: flex; align-items: center; gap: 6px;">
-                ✅ Status: {cell_count} cells loaded
-            </div>
-        """)
+        # Status indicator, updated with the cell count once the catalog has loaded
+        status_badge = self.status_badge
 
         # Dark mode toggle with modern styling
         dark_mode_toggle = pn.Row(
@@ -122,7 +210,11 @@ class BatteryDashboard(param.Parameterized):
         """Create modern tab navigation with icons"""
         # Create tab pages
         cell_selector_page = self.cell_selector_tab.create_layout()
-        cycle_plots_page = self.cycle_plots_tab.create_layout()
+        # Filled in by get_cycle_plots_tab when the tab is first opened or cells are loaded
+        self.cycle_plots_page = pn.Column(
+            pn.indicators.LoadingSpinner(value=True, size=40, align="center"),
+            sizing_mode="stretch_both"
+        )
 
         # Statistics placeholder with better styling
         stats_page = pn.Column(
@@ -171,12 +263,13 @@ class BatteryDashboard(param.Parameterized):
         # Create tabs with icons and modern styling
         tabs = pn.Tabs(
             ("📊 Cell Selection", cell_selector_page),
-            ("📈 Cycle Analysis", cycle_plots_page),
+            ("📈 Cycle Analysis", self.cycle_plots_page),
             ("📋 Statistics", stats_page),
             ("🤖 ML Analysis", ml_page),
             tabs_location="above",
             dynamic=True
         )
+        tabs.param.watch(self.on_tab_change, "active")
 
         return tabs
 
@@ -207,14 +300,12 @@ class BatteryDashboard(param.Parameterized):
         """Create the complete modern dashboard layout"""
         # Create modern components
         header = self.create_modern_header()
-        tabs = self.create_modern_tabs()
-        footer = self.create_modern_footer()
 
         # Use FastListTemplate for better layout control
         template = pn.template.FastListTemplate(
             title="Battery Analytics",
             header=header,
-            main=pn.Column(tabs, footer, sizing_mode="stretch_both"),
+            main=self.main_area,
             sidebar=None,
             accent_base_color="#4F78FF",
             header_background="#4F78FF",
@@ -225,11 +316,35 @@ class BatteryDashboard(param.Parameterized):
             theme_toggle=False  # We handle our own theme toggle
         )
 
+        self.build_tabs_when_ready()
         return template
 
 
+def create_error_page(error):
+    """Simple error page with modern styling, shown when the dashboard cannot be built."""
+    error_page = pn.Column(
+        pn.pane.HTML(f"""
+            <div style="text-align: center; padding: 60px 20px;">
+                <div style="font-size: 3rem; color: #EF4444; margin-bottom: 20px;">❌</div>
+                <h2 style="color: #1F2937; margin-bottom: 10px;">Dashboard Error</h2>
+                <p style="color: #6B7280; font-size: 1.1rem;">Failed to load dashboard</p>
+                <div style="margin-top: 20px; padding: 16px; background: #FEF2F2; 
+                            border: 1px solid #FECACA; border-radius: 8px; display: inline-block;">
+                    <code style="color: #DC2626;">{str(error)}</code>
+                </div>
+            </div>
+        """),
+        sizing_mode="stretch_both"
+    )
+    return error_page
+
+
 def create_app():
-    """Create and return the dashboard application"""
+    """Create and return the dashboard application for one session.
+
+    Pass this function (not its result) to ``pn.serve`` so every browser session gets its
+    own dashboard, all sharing the process-wide cell catalog.
+    """
     try:
         dashboard = BatteryDashboard()
         app = dashboard.create_layout()
@@ -239,39 +354,10 @@ def create_app():
         print(f"❌ Error creating dashboard: {e}")
         import traceback
         traceback.print_exc()
-        # Return a simple error page with modern styling
-        error_page = pn.Column(
-            pn.pane.HTML(f"""
-                <div style="text-align: center; padding: 60px 20px;">
-                    <div style="font-size: 3rem; color: #EF4444; margin-bottom: 20px;">❌</div>
-                    <h2 style="color: #1F2937; margin-bottom: 10px;">Dashboard Error</h2>
-                    <p style="color: #6B7280; font-size: 1.1rem;">Failed to load dashboard</p>
-                    <div style="margin-top: 20px; padding: 16px; background: #FEF2F2; 
-                                border: 1px solid #FECACA; border-radius: 8px; display: inline-block;">
-                        <code style="color: #DC2626;">{str(e)}</code>
-                    </div>
-                </div>
-            """),
-            sizing_mode="stretch_both"
-        )
-        return error_page
+        return create_error_page(e)
 
 
-# For Panel serve command
-if __name__ == '__main__':
-    app = create_app()
-    app.servable()
-else:
-    # For imports
-    try:
-        dashboard = BatteryDashboard()
-        app = dashboard.create_layout()
-    except Exception as e:
-        print(f"Warning: Dashboard initialization failed: {e}")
-        # Create a simple fallback app
-        app = pn.pane.HTML("""
-            <div style="text-align: center; padding: 40px;">
-                <h2>Dashboard Loading...</h2>
-                <p>Please refresh the page if this message persists.</p>
-            </div>
-        """)
\ No newline at end of file
+# For Panel serve command (``panel serve battery_dashboard/main.py`` runs this per session).
+# Importing the module builds nothing.
+if __name__ == '__main__' or __name__.startswith('bokeh_app'):
+    create_app().servable()
\ No newline at end of file
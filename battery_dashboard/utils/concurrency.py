@@ -0,0 +1,77 @@
+# battery_dashboard/utils/concurrency.py
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is still
+    running wait on the same future and receive its result (or exception) instead of
+    running the function again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future of the call in flight
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self):
+        """Number of keys currently being computed."""
+        with self._lock:
+            return len(self._calls)
+
+
+class ActivityCounter:
+    """Count operations in progress so background work can wait for them to finish.
+
+    Use as a context manager around the operation; ``wait_idle`` blocks until none are
+    in progress.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._active = 0
+
+    def __enter__(self):
+        with self._condition:
+            self._active += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._condition:
+            self._active -= 1
+            if not self._active:
+                self._condition.notify_all()
+
+    @property
+    def active(self):
+        with self._condition:
+            return self._active
+
+    def wait_idle(self, timeout=None):
+        """Block until no operation is in progress; returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._active, timeout)
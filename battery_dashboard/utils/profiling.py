@@ -0,0 +1,97 @@
+# battery_dashboard/utils/profiling.py
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from ..config import STARTUP_PROFILE
+
+
+class StartupProfiler:
+    """Times startup phases and the imports made during them (enabled by STARTUP_PROFILE).
+
+    ``phase`` prints how long a block took as soon as it ends. Inside ``track_imports``
+    every import of a module that was not loaded yet is timed, including the modules it
+    pulls in; ``report`` prints the slowest of them, once per process. When disabled all
+    three are no-ops.
+
+    ``track_imports`` replaces the process-wide ``builtins.__import__``, so it is meant for
+    module-level startup code; it is a no-op while another block is already tracking.
+    """
+
+    def __init__(self, enabled=STARTUP_PROFILE):
+        self.enabled = enabled
+        self.started_at = time.perf_counter()
+        self.phases = []   # (name, seconds)
+        self.imports = {}  # module name -> seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._tracking = False
+        self._reported = False
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases.append((name, elapsed))
+            print(f"[startup] {name}: {elapsed * 1000:.0f} ms "
+                  f"({time.perf_counter() - self.started_at:.2f}s since start)")
+
+    @contextmanager
+    def track_imports(self):
+        with self._lock:
+            start_tracking = self.enabled and not self._tracking
+            if start_tracking:
+                self._tracking = True
+        if not start_tracking:
+            yield
+            return
+        original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            # Only imports made at the outermost level are recorded; nested ones are
+            # part of their importer's time
+            depth = getattr(self._local, "depth", 0)
+            if depth or level or name in sys.modules:
+                self._local.depth = depth + 1
+                try:
+                    return original_import(name, globals, locals, fromlist, level)
+                finally:
+                    self._local.depth = depth
+
+            start = time.perf_counter()
+            self._local.depth = 1
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                self._local.depth = 0
+                self.imports[name] = self.imports.get(name, 0) + time.perf_counter() - start
+
+        builtins.__import__ = timed_import
+        try:
+            yield
+        finally:
+            with self._lock:
+                builtins.__import__ = original_import
+                self._tracking = False
+
+    def report(self, top=15):
+        """Print the slowest imports and all phases recorded so far; later calls do nothing."""
+        with self._lock:
+            if not self.enabled or self._reported:
+                return
+            self._reported = True
+        print(f"[startup] {time.perf_counter() - self.started_at:.2f}s since start")
+        for name, elapsed in sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:top]:
+            print(f"[startup]   import {name:<45} {elapsed * 1000:8.0f} ms")
+        for name, elapsed in self.phases:
+            print(f"[startup]   {name:<52} {elapsed * 1000:8.0f} ms")
+
+
+startup_profiler = StartupProfiler()
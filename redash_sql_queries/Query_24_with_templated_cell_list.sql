@@ -65,6 +65,7 @@ SELECT
     mta.average_coulombic_efficiency,
     mta.average_energy_efficiency,
     mta.discharge_capacity_retention,
+    mta.last_processed_timestamp,
 
     -- Additional calculated fields for filtering and grouping
     CASE
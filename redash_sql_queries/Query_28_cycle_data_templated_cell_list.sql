@@ -0,0 +1,17 @@
+-- Cycle analytics for a list of cells
+-- {{ cell_ids }} is a Redash text parameter holding a comma separated list of cell IDs,
+-- e.g. "101" or "101,102,103". The loader batches several cells per execution and splits
+-- the combined result back into per-cell frames on cell_id, so cell_id must stay in the output.
+SELECT
+    c.cell_id,
+    c.cell_name,
+    ca.*
+FROM
+    cell c
+    JOIN mergedtest mt ON c.cell_id = mt.cell_id
+    JOIN cycleanalytics ca ON mt.merged_test_id = ca.merged_test_id
+WHERE
+    c.cell_id IN ({{ cell_ids }})
+ORDER BY
+    c.cell_id,
+    ca.cycle_number
@@ -0,0 +1,26 @@
+-- Cycle analytics added since a cached copy was taken (delta sync for cells still under test)
+-- {{ cell_cycles }} is a Redash text parameter holding comma separated cell_id:cycle_number
+-- pairs, e.g. "101:2042,102:1875". For each cell the rows from that cycle number onwards are
+-- returned: the last cached cycle is included because it may have been incomplete when cached.
+-- The columns must match Query 28 so the rows can be appended to the cached frames.
+WITH since AS (
+    SELECT
+        split_part(item, ':', 1)::bigint AS cell_id,
+        split_part(item, ':', 2)::integer AS cycle_number
+    FROM
+        unnest(string_to_array('{{ cell_cycles }}', ',')) AS item
+)
+SELECT
+    c.cell_id,
+    c.cell_name,
+    ca.*
+FROM
+    since s
+    JOIN cell c ON c.cell_id = s.cell_id
+    JOIN mergedtest mt ON c.cell_id = mt.cell_id
+    JOIN cycleanalytics ca ON mt.merged_test_id = ca.merged_test_id
+WHERE
+    ca.cycle_number >= s.cycle_number
+ORDER BY
+    c.cell_id,
+    ca.cycle_number
@@ -0,0 +1,54 @@
+-- Cycle analytics for a list of cells with column projection, cycle type filter and sampling
+-- Parameters (Redash text parameters unless noted):
+--   {{ cell_ids }}    comma separated cell IDs, as in Query 28
+--   {{ columns }}     comma separated output columns, or cycles.* for all of them
+--   {{ cycle_types }} comma separated cycle types to keep, empty for all types
+--   {{ stride }}      number parameter; keep every stride-th cycle of each cell (1 keeps all)
+--   {{ log_points }}  number parameter; keep about this many log-spaced cycles per cell (0 keeps all)
+-- The first and last cycle of each cell and its first positive regular cycle (the
+-- normalization reference) are always kept. The loader validates the column names before they are
+-- substituted; cell_id and cycle_number must stay in the output.
+WITH cycles AS (
+    SELECT
+        c.cell_id,
+        c.cell_name,
+        ca.*
+    FROM
+        cell c
+        JOIN mergedtest mt ON c.cell_id = mt.cell_id
+        JOIN cycleanalytics ca ON mt.merged_test_id = ca.merged_test_id
+    WHERE
+        c.cell_id IN ({{ cell_ids }})
+        AND ('{{ cycle_types }}' = ''
+             OR ca.cycle_type = ANY(string_to_array('{{ cycle_types }}', ',')))
+),
+ranked AS (
+    SELECT
+        cycle_id,
+        ROW_NUMBER() OVER (PARTITION BY cell_id ORDER BY cycle_number) AS cycle_rank,
+        COUNT(*) OVER (PARTITION BY cell_id) AS cycle_count,
+        MIN(regular_cycle_number) FILTER (WHERE regular_cycle_number > 0)
+            OVER (PARTITION BY cell_id) AS first_regular_cycle
+    FROM
+        cycles
+)
+SELECT
+    {{ columns }}
+FROM
+    cycles
+    JOIN ranked USING (cycle_id)
+WHERE
+    (cycle_rank = 1 OR cycle_rank = cycle_count OR regular_cycle_number = first_regular_cycle)
+    OR (
+        ({{ stride }} <= 1 OR (cycle_rank - 1) % {{ stride }} = 0)
+        AND (
+            {{ log_points }} <= 0
+            -- First cycle of each log-spaced bucket (greatest() keeps ln() defined, since
+            -- PostgreSQL may evaluate this even for the always-kept cycles above)
+            OR floor({{ log_points }} * ln(cycle_rank) / ln(greatest(cycle_count, 2)))
+               > floor({{ log_points }} * ln(greatest(cycle_rank - 1, 1)) / ln(greatest(cycle_count, 2)))
+        )
+    )
+ORDER BY
+    cell_id,
+    cycle_number
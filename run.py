@@ -40,12 +40,13 @@ except Exception as e:
 # Import and run the dashboard
 try:
     from battery_dashboard.main import create_app
+    from battery_dashboard.data.catalog import warm_cell_catalog
     import panel as pn
 
     print("✓ Dashboard modules imported successfully")
 
-    # Create the app
-    app = create_app()
+    # Start loading the shared cell catalog; sessions show a loading shell until it is ready
+    warm_cell_catalog()
 
     # Serve the app
     print(f"🚀 Starting Battery Analytics Dashboard...")
@@ -55,7 +56,7 @@ try:
 
     # Use Panel's built-in server instead of subprocess
     pn.serve(
-        app,
+        create_app,  # Called once per browser session
         port=PANEL_PORT,
         host=PANEL_HOST,
         show=True,  # Automatically open browser
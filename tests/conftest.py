@@ -0,0 +1,38 @@
+# tests/conftest.py
+import io
+import json
+import os
+import pytest
+
+# config.py requires an API key at import time; the tests never contact Redash
+os.environ.setdefault("REDASH_API_KEY", "test")
+os.environ.setdefault("DISK_CACHE_ENABLED", "false")
+
+
+class FakeResponse:
+    """Stands in for a streamed ``requests.Response`` with the given body."""
+
+    def __init__(self, body, content_type="application/json"):
+        self.raw = io.BytesIO(body)
+        self.content = body
+        self.headers = {"Content-Type": content_type}
+        self.url = "http://redash.test/api"
+        self.closed = False
+
+    def json(self):
+        return json.loads(self.content)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def loaders(monkeypatch):
+    """The loaders module with empty caches of its own and no disk cache."""
+    from battery_dashboard.data import loaders
+    from battery_dashboard.data.cache import ResultCache
+
+    monkeypatch.setattr(loaders, "query_cache", ResultCache())
+    monkeypatch.setattr(loaders, "disk_cache", None)
+    monkeypatch.setattr(loaders, "result_versions", {})
+    return loaders
@@ -0,0 +1,86 @@
+# tests/test_cache.py
+import json
+import time
+import polars as pl
+import pytest
+from battery_dashboard.data.cache import DiskCache, ResultCache
+
+FRAME = pl.DataFrame({"cell_id": [1, 2, 3]})
+
+
+def age_disk_entry(cache, query_id, params, seconds):
+    """Make a disk cache entry look ``seconds`` old."""
+    _, meta_path = cache._paths(query_id, params)
+    metadata = json.loads(meta_path.read_text())
+    metadata["stored_at"] = time.time() - seconds
+    meta_path.write_text(json.dumps(metadata))
+
+
+def test_result_cache_expires_by_ttl_but_keeps_stale_entries():
+    cache = ResultCache(ttl=300)
+    cache.put("key", FRAME, age=400)
+    assert cache.get("key") is None
+    assert cache.get("key", ttl=500) is FRAME
+    assert cache.get_stale("key") is FRAME
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(ttl=300, max_entries=2)
+    cache.put("a", FRAME)
+    cache.put("b", FRAME)
+    cache.get("a")
+    cache.put("c", FRAME)
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_result_cache_is_bounded_by_bytes():
+    size = FRAME.estimated_size()
+    cache = ResultCache(ttl=300, max_bytes=size * 2)
+    for key in ("a", "b", "c"):
+        cache.put(key, FRAME)
+    assert "a" not in cache and len(cache) == 2
+    assert cache.total_bytes == size * 2
+
+    # Frames larger than the whole cache are not stored, and drop an older copy of the key
+    big = pl.DataFrame({"cell_id": list(range(1000))})
+    cache.put("b", big)
+    assert "b" not in cache
+    assert cache.total_bytes == size
+
+
+def test_disk_cache_scan_reports_age(tmp_path):
+    cache = DiskCache(tmp_path, ttl=3600)
+    cache.put(24, {"a": 1}, FRAME, {"id": 7})
+    age_disk_entry(cache, 24, {"a": 1}, 100)
+
+    lazy_frame, age = cache.scan(24, {"a": 1})
+    assert lazy_frame.collect().equals(FRAME)
+    assert 99 < age < 110
+    assert cache.scan(24, {"a": 1}, ttl=50) is None
+    assert cache.scan_stale(24, {"a": 1}) is not None
+    assert cache.get_result_info(24, {"a": 1}) == {"id": 7}
+
+
+@pytest.fixture
+def disk_loaders(loaders, tmp_path, monkeypatch):
+    monkeypatch.setattr(loaders, "disk_cache", DiskCache(tmp_path, ttl=3600))
+    monkeypatch.setattr(loaders, "query_cache", ResultCache(ttl=300))
+    return loaders
+
+
+def test_disk_entries_older_than_the_memory_ttl_are_not_served(disk_loaders):
+    disk_loaders.disk_cache.put(24, None, FRAME)
+    age_disk_entry(disk_loaders.disk_cache, 24, None, 400)
+    assert disk_loaders.load_cached_result(24) is None
+
+
+def test_promoted_disk_entries_keep_their_age(disk_loaders):
+    disk_loaders.disk_cache.put(24, None, FRAME)
+    age_disk_entry(disk_loaders.disk_cache, 24, None, 200)
+
+    assert disk_loaders.load_cached_result(24).equals(FRAME)
+    key = disk_loaders.make_cache_key(24)
+    # Promoted into memory, but expiring 100 s from now rather than 300 s
+    assert disk_loaders.query_cache.get(key) is not None
+    assert disk_loaders.query_cache.get(key, ttl=150) is None
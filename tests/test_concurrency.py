@@ -0,0 +1,62 @@
+# tests/test_concurrency.py
+import threading
+import time
+import pytest
+from battery_dashboard.utils.concurrency import SingleFlight
+
+
+def run_concurrently(fn, count):
+    """Call ``fn`` from ``count`` threads at once; returns results and raised errors."""
+    results, errors = [], []
+    start = threading.Barrier(count)
+
+    def worker():
+        start.wait()
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def slow_query():
+        calls.append(1)
+        time.sleep(0.05)
+        return "result"
+
+    results, errors = run_concurrently(lambda: flight.do("key", slow_query), 5)
+    assert results == ["result"] * 5 and not errors
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_waiting_callers_receive_the_leaders_exception():
+    flight = SingleFlight()
+
+    def failing_query():
+        time.sleep(0.05)
+        raise ValueError("Redash down")
+
+    results, errors = run_concurrently(lambda: flight.do("key", failing_query), 3)
+    assert not results and len(errors) == 3
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_calls_after_completion_run_again():
+    flight = SingleFlight()
+    calls = []
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 2
+    with pytest.raises(KeyError):
+        flight.do("other", lambda: {}["missing"])
+    assert flight.in_flight() == 0
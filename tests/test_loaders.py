@@ -0,0 +1,135 @@
+# tests/test_loaders.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import polars as pl
+
+
+def test_cycle_queries_share_one_pool_across_loads(loaders, monkeypatch):
+    lock = threading.Lock()
+    running = [0, 0]  # current, peak
+
+    def fetch_cell(cell_id, options=None):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return {str(cell_id): pl.DataFrame({"cell_id": [cell_id]})}
+
+    monkeypatch.setattr(loaders, "fetch_cell_cycle_frame", fetch_cell)
+    monkeypatch.setattr(loaders, "get_cached_cycle_frame", lambda cell_id, options=None: None)
+    monkeypatch.setattr(loaders, "_cycle_executor", ThreadPoolExecutor(max_workers=2))
+
+    results = {}
+
+    def load(name, cell_ids):
+        results[name] = loaders.fetch_cycle_frames(cell_ids, batched=False, max_workers=8,
+                                                   options={"stride": 1})
+
+    threads = [threading.Thread(target=load, args=(name, range(start, start + 6)))
+               for name, start in (("a", 0), ("b", 100))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert running[1] <= 2
+    assert sorted(results["a"]) == [str(cell_id) for cell_id in range(6)]
+    assert len(results["b"]) == 6
+
+
+def test_unchanged_result_reuses_the_cached_copy(loaders, monkeypatch):
+    stale = pl.DataFrame({"cell_id": [1]})
+    loaders.store_result(24, None, stale, {"id": 7, "retrieved_at": "then"})
+    monkeypatch.setattr(loaders, "fetch_query_result",
+                        lambda query_id, params, transport, known_result_id=None: (None, {"id": known_result_id}))
+
+    assert loaders._fetch_and_store(24, None, 0, None) is stale
+    assert loaders.get_result_version(24).items() >= {"id": 7, "retrieved_at": "then"}.items()
+
+
+def test_changed_result_does_not_read_the_cached_copy(loaders, monkeypatch):
+    loaders.store_result(24, None, pl.DataFrame({"cell_id": [1]}), {"id": 7})
+    fresh = pl.DataFrame({"cell_id": [1, 2]})
+    monkeypatch.setattr(loaders, "fetch_query_result",
+                        lambda query_id, params, transport, known_result_id=None: (fresh, {"id": 8}))
+
+    def load_stale_result(query_id, params=None):
+        raise AssertionError("the cached copy is only needed when the result is unchanged")
+
+    monkeypatch.setattr(loaders, "load_stale_result", load_stale_result)
+    assert loaders._fetch_and_store(24, None, 0, None) is fresh
+    assert loaders.get_result_version(24)["id"] == 8
+
+
+def cycle_frame(cell_id, cycles, value=1.0):
+    return pl.DataFrame({"cell_id": [cell_id] * len(cycles), "cycle_number": cycles,
+                         "discharge_capacity": [value] * len(cycles)})
+
+
+PROCESSING = pl.DataFrame({"cell_id": [1, 2], "test_status": ["processing", "completed"]})
+
+
+def test_delta_sync_splices_the_new_cycles(loaders, monkeypatch):
+    key_params = loaders.cycle_params(1)
+    loaders.store_result(loaders.CYCLE_QUERY_ID, key_params, cycle_frame(1, [1, 2, 3]), {"fetched_at": time.time()})
+    loaders.store_result(loaders.CYCLE_QUERY_ID, loaders.cycle_params(2), cycle_frame(2, [1]), {"fetched_at": time.time()})
+
+    delta_cells = loaders.plan_delta_cells([1, 2], PROCESSING)
+    assert list(delta_cells) == ["1"]
+
+    requests = []
+
+    def fetch_delta(query_id, params):
+        requests.append(params)
+        return cycle_frame(1, [3, 4], value=2.0)
+
+    monkeypatch.setattr(loaders, "fetch_query_frame", fetch_delta)
+    frame = loaders.fetch_cycle_delta(delta_cells)["1"]
+    assert requests == [{"cell_cycles": "1:3"}]
+    assert frame["cycle_number"].to_list() == [1, 2, 3, 4]
+    assert frame["discharge_capacity"].to_list() == [1.0, 1.0, 2.0, 2.0]
+    assert loaders.get_result_version(loaders.CYCLE_QUERY_ID, key_params)["delta_syncs"] == 1
+
+
+def test_delta_synced_copies_are_refetched_in_full_eventually(loaders, monkeypatch):
+    params = loaders.cycle_params(1)
+    frame = cycle_frame(1, [1, 2])
+    monkeypatch.setattr(loaders, "CYCLE_DELTA_MAX_SYNCS", 2)
+    monkeypatch.setattr(loaders, "CYCLE_DELTA_MAX_AGE", 3600)
+
+    loaders.store_result(loaders.CYCLE_QUERY_ID, params, frame, {"fetched_at": time.time(), "delta_syncs": 1})
+    assert "1" in loaders.plan_delta_cells([1], PROCESSING)
+
+    loaders.store_result(loaders.CYCLE_QUERY_ID, params, frame, {"fetched_at": time.time(), "delta_syncs": 2})
+    assert loaders.plan_delta_cells([1], PROCESSING) == {}
+
+    loaders.store_result(loaders.CYCLE_QUERY_ID, params, frame, {"fetched_at": time.time() - 7200})
+    assert loaders.plan_delta_cells([1], PROCESSING) == {}
+
+    # Without a record of the last full fetch the copy cannot be trusted either
+    loaders.store_result(loaders.CYCLE_QUERY_ID, params, frame)
+    assert loaders.plan_delta_cells([1], PROCESSING) == {}
+
+
+def test_cycle_batches_are_bounded_by_cells_and_rows(loaders):
+    metadata = pl.DataFrame({"cell_id": [1, 2, 3, 4, 5], "total_cycles": [600, 600, 100, None, 50]})
+    batches = loaders.plan_cycle_batches([1, 2, 3, 4, 5], metadata, batch_size=3, max_rows=1000)
+    # Cell 4 has no cycle count and is expected to have DEFAULT_ROWS_PER_CELL rows
+    assert batches == [[1], [2, 3], [4], [5]]
+    assert loaders.plan_cycle_batches([1, 2, 3], None, batch_size=2, max_rows=10 ** 6) == [[1, 2], [3]]
+
+
+def test_cycle_batch_is_split_into_per_cell_cache_entries(loaders, monkeypatch):
+    combined = pl.concat([cycle_frame(1, [1, 2]), cycle_frame(2, [1])])
+    monkeypatch.setattr(loaders, "fetch_query_frame", lambda query_id, params: combined)
+
+    frames = loaders.fetch_cycle_batch([1, 2, 3])
+    assert frames["1"]["cycle_number"].to_list() == [1, 2]
+    assert frames["2"].height == 1
+    # Cells without rows are cached as empty, so they are not queried again
+    assert frames["3"].is_empty()
+    assert loaders.get_cached_cycle_frame(3) is not None
+    assert loaders.get_cached_cycle_frame(1).equals(frames["1"])
@@ -0,0 +1,33 @@
+# tests/test_narrowing.py
+import pytest
+from battery_dashboard.data.search import narrows
+from test_search import search
+
+
+@pytest.mark.parametrize("previous, query", [
+    ("alp", "alpha"),
+    ("alpha", "alpha"),
+    ("alpha", "alpha beta"),
+    ("alpha", "alpha AND design:d1"),
+    ("cycles:>10", "cycles:>10 alpha"),
+    ("design:d1 alp", "design:d1 alpha"),
+])
+def test_narrows_accepts(previous, query):
+    assert narrows(previous, query)
+    # The narrowed query never matches rows outside the previous result
+    assert set(search(query)) <= set(search(previous))
+
+
+@pytest.mark.parametrize("previous, query", [
+    ("", "alpha"),
+    ("alpha", "alp"),
+    ("alpha", "alpha OR beta"),
+    ("alpha", "NOT alpha"),
+    ("alpha", "(alpha)"),
+    ("cycles:>10", "cycles:>1"),
+    ("design:d1", "design:d1,d2"),
+    ("alpha beta", "alpha"),
+    ("alpha", "alpha ("),
+])
+def test_narrows_rejects(previous, query):
+    assert not narrows(previous, query)
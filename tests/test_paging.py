@@ -0,0 +1,69 @@
+# tests/test_paging.py
+import polars as pl
+from battery_dashboard.data.catalog import CatalogSnapshot
+from battery_dashboard.data.paging import PagedTableSource, header_filter_expr
+from battery_dashboard.data.search import compile_search
+from test_search import CELLS
+
+
+def test_paged_source_pages_in_order():
+    source = PagedTableSource(CatalogSnapshot(1, CELLS).view(), columns=["cell_id"], page_size=2)
+    assert source.total == 5
+    assert source.page_count == 3
+    assert source.page_frame()["cell_id"].to_list() == [1, 2]
+    source.set_page(2)
+    assert source.page_frame()["cell_id"].to_list() == [5]
+    source.set_page(10)
+    assert source.page == 2
+
+
+def test_paged_source_sorts_before_paging():
+    source = PagedTableSource(CatalogSnapshot(1, CELLS).view(), columns=["cell_id"], page_size=2)
+    source.set_sorters([{"field": "total_cycles", "dir": "desc"}])
+    assert source.page_frame()["cell_id"].to_list() == [5, 4]
+    source.set_page(1)
+    assert source.page_frame()["cell_id"].to_list() == [3, 2]
+
+    # Nulls sort last in either direction
+    source.set_sorters([{"field": "discharge_capacity_retention", "dir": "asc"}])
+    assert source.ordered_view().frame(["cell_id"])["cell_id"].to_list() == [4, 3, 2, 1, 5]
+
+    source.set_sorters([{"field": "design_name", "dir": "asc"}, {"field": "total_cycles", "dir": "desc"}])
+    assert source.ordered_view().frame(["cell_id"])["cell_id"].to_list() == [3, 1, 5, 2, 4]
+
+
+def test_paged_source_filters_and_sorts_a_search_result():
+    snapshot = CatalogSnapshot(1, CELLS)
+    view = snapshot.view().filter(compile_search("total_cycles:>100", CELLS.schema))
+    source = PagedTableSource(view, columns=["cell_id"], page_size=2)
+    source.set_filters([{"field": "design_name", "type": "in", "value": ["D1", "D2"]}])
+    source.set_sorters([{"field": "total_cycles", "dir": "desc"}])
+    assert source.total == 3
+    assert source.page_frame()["cell_id"].to_list() == [5, 3]
+    source.set_page(1)
+    assert source.page_frame()["cell_id"].to_list() == [2]
+    # A new view keeps the header filters and sort and starts from the first page
+    source.set_view(snapshot.view())
+    assert source.page == 0
+    assert source.ordered_view().frame(["cell_id"])["cell_id"].to_list() == [5, 3, 2, 1]
+
+
+def test_sorts_on_nested_or_unknown_columns_are_ignored():
+    data = CELLS.with_columns(pl.Series("tags", [[1], [2], [3], [4], [5]]))
+    source = PagedTableSource(CatalogSnapshot(1, data).view(), columns=["cell_id"], page_size=2)
+    source.set_sorters([{"field": "tags", "dir": "desc"}, {"field": "missing", "dir": "asc"}])
+    assert source.ordered_view().frame(["cell_id"])["cell_id"].to_list() == [1, 2, 3, 4, 5]
+
+
+def test_header_filters_match_like_the_table():
+    schema = CELLS.schema
+    assert header_filter_expr([], schema) is None
+    assert header_filter_expr([{"field": "missing", "type": "like", "value": "a"}], schema) is None
+
+    def matching(filters):
+        return CELLS.filter(header_filter_expr(filters, schema))["cell_id"].to_list()
+
+    assert matching([{"field": "cell_name", "type": "like", "value": "ALPHA"}]) == [1, 2]
+    assert matching([{"field": "cell_name", "type": "=", "value": "Gamma"}]) == [4]
+    assert matching([{"field": "total_cycles", "type": ">=", "value": "400"}]) == [4, 5]
+    assert matching([{"field": "design_name", "type": "in", "value": ["D2"]}]) == [2, 5]
@@ -0,0 +1,80 @@
+# tests/test_redash.py
+import pytest
+import requests
+from battery_dashboard.api.redash import CircuitOpenError, RedashClient, RedashError
+
+
+def response(status, body=b"{}"):
+    result = requests.Response()
+    result.status_code = status
+    result._content = body
+    result.url = "http://redash.test/api"
+    return result
+
+
+class FakeSession:
+    """Replays the given outcomes (responses or exceptions to raise) in order."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def client_with(*outcomes, **options):
+    options = {"max_retries": 2, "backoff_base": 0, "backoff_max": 0, "circuit_threshold": 2,
+               "circuit_cooldown": 60, **options}
+    client = RedashClient(base_url="http://redash.test", api_key="test", **options)
+    client.session = FakeSession(*outcomes)
+    return client
+
+
+def test_transient_failures_are_retried():
+    client = client_with(requests.exceptions.ConnectionError("refused"), response(503), response(200))
+    assert client.request("GET", "/api/jobs/1").status_code == 200
+    assert client.session.calls == 3
+    assert not client.circuit_open
+
+
+def test_client_errors_are_not_retried():
+    client = client_with(response(404))
+    with pytest.raises(RedashError):
+        client.request("GET", "/api/jobs/1")
+    assert client.session.calls == 1
+    assert not client.circuit_open
+
+
+def test_circuit_opens_after_consecutive_failures():
+    client = client_with(*[response(502)] * 6)
+    for _ in range(2):
+        with pytest.raises(RedashError):
+            client.request("GET", "/api/jobs/1")
+    assert client.circuit_open
+
+    calls = client.session.calls
+    with pytest.raises(CircuitOpenError):
+        client.request("GET", "/api/jobs/1")
+    assert client.session.calls == calls
+
+
+def test_one_trial_request_closes_the_circuit_after_the_cooldown():
+    client = client_with(*[response(502)] * 6, response(200), circuit_cooldown=0)
+    for _ in range(2):
+        with pytest.raises(RedashError):
+            client.request("GET", "/api/jobs/1")
+    assert client.circuit_open
+
+    assert client.request("GET", "/api/jobs/1").status_code == 200
+    assert not client.circuit_open
+
+
+def test_non_json_bodies_raise_redash_error():
+    client = client_with(response(200, b"<html>Sign in</html>"))
+    with pytest.raises(RedashError):
+        client.post_query_results(24)
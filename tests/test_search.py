@@ -0,0 +1,69 @@
+# tests/test_search.py
+import polars as pl
+import pytest
+from battery_dashboard.data.catalog import CatalogSnapshot
+from battery_dashboard.data.search import SearchSyntaxError, compile_search
+
+CELLS = pl.DataFrame({
+    "cell_id": [1, 2, 3, 4, 5],
+    "cell_name": ["Alpha-1", "alpha-2", "Beta-1", "Gamma", None],
+    "total_cycles": [100, 200, 300, 400, 500],
+    "regular_cycles": pl.Series([10, 20, 30, 40, 50], dtype=pl.Int32),
+    "discharge_capacity_retention": [0.99, 0.95, 0.90, 0.85, None],
+    "design_name": pl.Series(["D1", "D2", "D1", "D3", "D2"], dtype=pl.Categorical),
+})
+
+
+def search(query, data=CELLS):
+    """Cell IDs matching ``query``, searched like the cell table does."""
+    predicate = compile_search(query, data.schema)
+    view = CatalogSnapshot(1, data).view()
+    return view.filter(predicate).frame(["cell_id"])["cell_id"].to_list()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("alpha", [1, 2]),
+    ('"beta-1"', [3]),
+    ("name:ALPHA", [1, 2]),
+    ("name:=alpha-1", [1]),
+    ("name:!=alpha-1", [2, 3, 4]),
+    ("total_cycles:>300", [4, 5]),
+    ("total_cycles:>=300", [3, 4, 5]),
+    ("total_cycles:<200", [1]),
+    ("total_cycles:<=200", [1, 2]),
+    ("total_cycles:300", [3]),
+    ("total_cycles:200..400", [2, 3, 4]),
+    ("total_cycles:400..", [4, 5]),
+    ("total_cycles:..100", [1]),
+    ("design:d1,d3", [1, 3, 4]),
+    ("alpha AND cycles:>15", [2]),
+    ("alpha cycles:>15", [2]),
+    ("gamma OR beta", [3, 4]),
+    ("NOT alpha", [3, 4, 5]),
+    ("(alpha OR beta) AND design:d1", [1, 3]),
+    ("retention:>=0.9", [1, 2, 3]),
+])
+def test_search_operators(query, expected):
+    assert search(query) == expected
+
+
+def test_empty_query_compiles_to_none():
+    assert compile_search("   ", CELLS.schema) is None
+
+
+@pytest.mark.parametrize("query", ["unknown:1", "total_cycles:abc", "(alpha", "name:", "total_cycles:1.5"])
+def test_invalid_queries_raise(query):
+    with pytest.raises(SearchSyntaxError):
+        compile_search(query, CELLS.schema)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("total_cycles:100,300", [1, 3]),
+    ("total_cycles:(200, 500)", [2, 5]),
+    ("cycles:10,50", [1, 5]),
+    ("total_cycles:100.0,400", [1, 4]),
+    ("retention:0.99,0.85", [1, 4]),
+    ("retention:(0.9)", [3]),
+])
+def test_in_lists_on_numeric_columns(query, expected):
+    assert search(query) == expected
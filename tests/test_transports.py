@@ -0,0 +1,79 @@
+# tests/test_transports.py
+import io
+import json
+import polars as pl
+import pytest
+from battery_dashboard.api.redash import RedashError
+from battery_dashboard.data.transports import fetch_json_frame, fetch_stream_frame, parse_result_stream, peek_query_result
+from conftest import FakeResponse
+
+DATA = {"columns": [{"name": "cell_id", "type": "integer"}], "rows": [{"cell_id": 1}, {"cell_id": 2}]}
+
+
+def payload(*items):
+    """A Redash results body with the query_result keys in the given order."""
+    values = {"id": 7, "retrieved_at": "2026-01-01T00:00:00", "data": DATA}
+    return json.dumps({"query_result": {key: values[key] for key in items}}).encode()
+
+
+class FakeClient:
+    def __init__(self, body):
+        self.body = body
+        self.downloads = []
+
+    def execute_query(self, query_id, params=None, max_age=None, stream=False):
+        return FakeResponse(self.body)
+
+    def post_query_results(self, query_id, params=None, max_age=None):
+        return json.loads(self.body)
+
+    def get_query_result(self, query_result_id, filetype="json", stream=False):
+        self.downloads.append(query_result_id)
+        return FakeResponse(self.body)
+
+
+@pytest.mark.parametrize("order", [("id", "retrieved_at", "data"), ("data", "retrieved_at", "id")])
+def test_parse_result_stream_reads_either_key_order(order):
+    info, columns, values = parse_result_stream(io.BytesIO(payload(*order)))
+    assert info == {"id": 7, "retrieved_at": "2026-01-01T00:00:00"}
+    assert [column["name"] for column in columns] == ["cell_id"]
+    assert values == {"cell_id": [1, 2]}
+
+
+@pytest.mark.parametrize("order", [("id", "retrieved_at", "data"), ("data", "retrieved_at", "id")])
+def test_known_result_is_detected_in_either_key_order(order):
+    frame, info = fetch_stream_frame(FakeClient(payload(*order)), 24, known_result_id=7)
+    assert frame is None
+    assert info["id"] == 7
+
+    assert peek_query_result(FakeClient(payload(*order)), 24)["id"] == 7
+
+
+@pytest.mark.parametrize("body", [b"<html><body>502 Bad Gateway</body></html>", payload("id", "data")[:40]])
+def test_unreadable_bodies_raise_redash_error(body):
+    with pytest.raises(RedashError):
+        fetch_stream_frame(FakeClient(body), 24)
+
+
+def test_unreadable_body_falls_back_to_the_stale_result(loaders, monkeypatch):
+    stale = pl.DataFrame({"cell_id": [1, 2]})
+    loaders.query_cache.put(loaders.make_cache_key(24), stale)
+    monkeypatch.setattr(loaders, "get_redash_client", lambda: FakeClient(b"<html>login</html>"))
+
+    # A TTL of 0 makes the cached entry stale, so Redash is asked first
+    result = loaders.get_redash_query_results(24, cache_ttl=0, transport="stream")
+    assert result.equals(stale)
+
+
+def test_json_transport_skips_unchanged_results():
+    client = FakeClient(payload("id", "retrieved_at", "data"))
+    frame, info = fetch_json_frame(client, 24, known_result_id=7)
+    assert frame is None and info["id"] == 7
+    assert client.downloads == []
+
+
+def test_json_transport_downloads_changed_results_by_id():
+    client = FakeClient(payload("id", "retrieved_at", "data"))
+    frame, info = fetch_json_frame(client, 24, known_result_id=6)
+    assert frame["cell_id"].to_list() == [1, 2]
+    assert client.downloads == [7]